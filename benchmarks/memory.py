@@ -0,0 +1,98 @@
+# memory.py
+# Redis memory per job for the full and compact job hash encodings.
+#
+#   python benchmarks/memory.py --jobs 200000
+#   python benchmarks/memory.py --jobs 10000000 --finish
+#
+# Each encoding is enqueued into its own scratch namespace against a live
+# Redis; the used_memory delta covers the hash plus its index, counter and
+# pending list entries. Results are projected to --project jobs (10M by
+# default), so a smaller run is enough for a first estimate. Scratch keys are
+# removed afterwards.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queuectl.models import Job
+from queuectl.redisConnection import RedisConnection
+from queuectl.storage import Storage
+
+
+def _used_memory(client):
+    return client.info("memory")["used_memory"]
+
+
+def _clear(client, ns):
+    keys = []
+    for key in client.scan_iter(match=f"{ns}:*", count=1000):
+        keys.append(key)
+        if len(keys) >= 1000:
+            client.unlink(*keys)
+            keys = []
+    if keys:
+        client.unlink(*keys)
+
+
+def _jobs(count):
+    for i in range(count):
+        yield Job.new(f"python tasks/report.py --customer {i}", max_retries=3,
+                      queue="reports" if i % 4 == 0 else "default")
+
+
+def measure(client, compact, count, finish, sample=1000):
+    ns = f"queuectl-bench-mem-{'compact' if compact else 'full'}"
+    _clear(client, ns)
+    storage = Storage(namespace=ns, compact=compact)
+    before = _used_memory(client)
+
+    started = time.perf_counter()
+    storage.enqueue_many(_jobs(count), chunk_size=1000)
+    if finish:
+        queues = {"default": 3, "reports": 1}
+        while True:
+            job = storage.fetchNextJob(worker_id=1, queues=queues)
+            if job is None:
+                break
+            storage.mark_completed(job, worker_id=1)
+    elapsed = time.perf_counter() - started
+
+    total = _used_memory(client) - before
+    job_ids = client.zrange(storage.getIndexKey(), 0, sample - 1)
+    hash_bytes = sum(client.memory_usage(storage.getKey(job_id), samples=0) or 0 for job_id in job_ids)
+    _clear(client, ns)
+    return {
+        "per_job": total / count,
+        "hash_per_job": hash_bytes / max(len(job_ids), 1),
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis memory per job by job hash encoding")
+    parser.add_argument("--url", default="redis://localhost:6379/0")
+    parser.add_argument("--jobs", type=int, default=200000, help="Jobs written per encoding")
+    parser.add_argument("--project", type=int, default=10_000_000, help="Job count to project totals to")
+    parser.add_argument("--finish", action="store_true",
+                        help="Claim and complete every job first, as retained finished jobs look")
+    args = parser.parse_args()
+
+    client = RedisConnection.get_client(args.url)
+    results = {}
+    for name, compact in (("full", False), ("compact", True)):
+        results[name] = measure(client, compact, args.jobs, args.finish)
+
+    print(f"{'encoding':<10}{'bytes/job':>12}{'hash bytes/job':>16}"
+          f"{'at ' + format(args.project, ',') + ' jobs':>22}{'write time':>12}")
+    for name, result in results.items():
+        projected = result["per_job"] * args.project / 2 ** 30
+        print(f"{name:<10}{result['per_job']:>12,.0f}{result['hash_per_job']:>16,.0f}"
+              f"{projected:>18,.2f} GiB{result['elapsed']:>11.1f}s")
+    saved = 1 - results["compact"]["per_job"] / results["full"]["per_job"]
+    print(f"\ncompact saves {saved:.0%} per job")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# run.py
+# Benchmark suite for the queue engine. Every case runs in its own scratch
+# namespace and removes it afterwards; results are written as JSON so runs can
+# be compared.
+#
+#   python benchmarks/run.py                         # throwaway server, small sizes
+#   python benchmarks/run.py --scale full -o after.json --compare before.json
+#   python benchmarks/run.py --url redis://localhost:6379/15 --only enqueue_bulk,claim
+#
+# Without --url a throwaway redis-server is started on a unix socket (fakeredis'
+# TCP server when redis-server is not installed; its numbers only compare with
+# other fakeredis runs).
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queuectl.jobState as jobState
+from queuectl.models import Job
+from queuectl.redisConnection import RedisConnection
+from queuectl.storage import Storage
+from queuectl.worker import WorkerProcess
+
+# Job counts per case at each scale
+SIZES = {
+    "small": {"enqueue_single": 2000, "enqueue_bulk": 20000, "claim": 5000, "delayed_drain": 10000,
+              "reads": 100000, "end_to_end": 1000},
+    "full": {"enqueue_single": 20000, "enqueue_bulk": 500000, "claim": 50000, "delayed_drain": 100000,
+             "reads": 1000000, "end_to_end": 10000},
+}
+
+
+def _percentiles(samples):
+    """p50/p90/p99/max of a list of seconds, in milliseconds."""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000
+    return {"p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99), "max_ms": samples[-1] * 1000}
+
+
+def _jobs(count, command="true", queue="default"):
+    for i in range(count):
+        yield Job.new(command, max_retries=3, job_id=f"bench-{i}", queue=queue)
+
+
+class Bench:
+    """One case's scratch namespace on the benchmark server."""
+
+    def __init__(self, client, name, compact=False):
+        self.client = client
+        self.ns = f"queuectl-bench-{name}"
+        self.clear()
+        self.storage = Storage(namespace=self.ns, compact=compact)
+
+    def clear(self):
+        keys = []
+        for key in self.client.scan_iter(match=f"{self.ns}:*", count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+
+def bench_enqueue_single(client, n, options):
+    bench = Bench(client, "enqueue-single", options["compact"])
+    started = time.perf_counter()
+    for job in _jobs(n):
+        bench.storage.enqueue(job)
+    elapsed = time.perf_counter() - started
+    bench.clear()
+    return {"jobs": n, "seconds": elapsed, "jobs_per_sec": n / elapsed}
+
+
+def bench_enqueue_bulk(client, n, options):
+    bench = Bench(client, "enqueue-bulk", options["compact"])
+    started = time.perf_counter()
+    bench.storage.enqueue_many(_jobs(n), chunk_size=1000)
+    elapsed = time.perf_counter() - started
+    bench.clear()
+    return {"jobs": n, "seconds": elapsed, "jobs_per_sec": n / elapsed}
+
+
+def bench_claim(client, n, options):
+    """Latency of fetchNextJob claiming from a full queue, then of mark_completed."""
+    bench = Bench(client, "claim", options["compact"])
+    bench.storage.enqueue_many(_jobs(n), chunk_size=1000)
+    claims = []
+    completions = []
+    for _ in range(n):
+        started = time.perf_counter()
+        job = bench.storage.fetchNextJob(worker_id=1)
+        claims.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        bench.storage.mark_completed(job, worker_id=1)
+        completions.append(time.perf_counter() - started)
+    bench.clear()
+    return {"jobs": n, "claim": _percentiles(claims), "complete": _percentiles(completions)}
+
+
+def bench_delayed_drain(client, n, options):
+    """Time for moveReadyDelayedJob to promote n due retries back to pending."""
+    bench = Bench(client, "delayed", options["compact"])
+    jobs = list(_jobs(n))
+    for i in range(0, n, 1000):
+        pipe = client.pipeline(transaction=False)
+        for job in jobs[i:i + 1000]:
+            job.state = jobState.JobState.DELAYED.value
+            bench.storage.saveState(job, client=pipe)
+            pipe.zadd(f"{bench.ns}:queue:delayed", {job.id: 0})
+        pipe.execute()
+    started = time.perf_counter()
+    moved = 0
+    while True:
+        step = bench.storage.moveReadyDelayedJob(options["batch_size"])
+        moved += step
+        if step < options["batch_size"]:
+            break
+    elapsed = time.perf_counter() - started
+    bench.clear()
+    return {"jobs": moved, "seconds": elapsed, "jobs_per_sec": moved / elapsed}
+
+
+def bench_reads(client, n, options, repeat=20):
+    """Dashboard and CLI reads against n jobs: summaries, a page of jobs, and listJobs of a 1000-job queue."""
+    bench = Bench(client, "reads", options["compact"])
+    bench.storage.enqueue_many(_jobs(n), chunk_size=1000)
+    bench.storage.enqueue_many((Job.new("true", max_retries=3, queue="small") for _ in range(1000)))
+
+    def timed(fn):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        return _percentiles(samples)
+
+    result = {
+        "jobs": n,
+        "getSummary": timed(bench.storage.getSummary),
+        "getQueueSummary": timed(bench.storage.getQueueSummary),
+        "listJobsPage_first": timed(lambda: bench.storage.listJobsPage(limit=100)),
+        "listJobsPage_deep": timed(lambda: bench.storage.listJobsPage(cursor=n // 2, limit=100)),
+        "listJobs_1000": timed(lambda: bench.storage.listJobs(queue="small")),
+    }
+    bench.clear()
+    return result
+
+
+def _worker_entry(url, ns, compact, worker_id, options):
+    # Children must not reuse the parent's connection
+    RedisConnection._client = None
+    RedisConnection.get_client(url)
+    sys.stdout = open(os.devnull, "w")
+    WorkerProcess(Storage(namespace=ns, compact=compact), worker_id, **options).start()
+
+
+def bench_end_to_end(client, n, options):
+    """No-op jobs per second from enqueue to COMPLETED, for each worker count."""
+    runs = {}
+    for workers in options["workers"]:
+        bench = Bench(client, f"e2e-{workers}", options["compact"])
+        worker_options = {"block_timeout": 1, "concurrency": options["concurrency"], "heartbeat_interval": 5}
+        procs = [multiprocessing.Process(target=_worker_entry, args=(options["url"], bench.ns, options["compact"],
+                                                                      i + 1, worker_options))
+                 for i in range(workers)]
+        for proc in procs:
+            proc.start()
+        # Let the workers connect and block before the clock starts
+        while client.scard(f"{bench.ns}:workers:active") < workers:
+            time.sleep(0.05)
+
+        started = time.perf_counter()
+        bench.storage.enqueue_many(_jobs(n), chunk_size=1000)
+        done = 0
+        while done < n:
+            time.sleep(0.01)
+            done = int(client.hget(f"{bench.ns}:counts", jobState.JobState.COMPLETED.value) or 0)
+        elapsed = time.perf_counter() - started
+
+        bench.storage.set_stop_signal()
+        for proc in procs:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+        bench.clear()
+        runs[str(workers)] = {"jobs": n, "seconds": elapsed, "jobs_per_sec": n / elapsed}
+    return {"concurrency": options["concurrency"], "workers": runs}
+
+
+CASES = {
+    "enqueue_single": bench_enqueue_single,
+    "enqueue_bulk": bench_enqueue_bulk,
+    "claim": bench_claim,
+    "delayed_drain": bench_delayed_drain,
+    "reads": bench_reads,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def _start_server(directory):
+    """Throwaway server: redis-server on a unix socket, else fakeredis over TCP. Returns (url, stop, backend)."""
+    if shutil.which("redis-server"):
+        path = os.path.join(directory, "redis.sock")
+        proc = subprocess.Popen(
+            ["redis-server", "--port", "0", "--unixsocket", path, "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+        )
+        while not os.path.exists(path):
+            time.sleep(0.05)
+        return f"unix://{path}", proc.terminate, "redis-server"
+
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("Neither redis-server nor fakeredis is installed; pass --url")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = fakeredis.TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0", server.shutdown, "fakeredis"
+
+
+def _metadata(client, backend, scale, encoding):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        redis_version = client.info("server").get("redis_version", "")
+    except Exception:
+        redis_version = ""
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "backend": backend,
+        "redis_version": redis_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "encoding": encoding,
+    }
+
+
+def _flatten(value, prefix=""):
+    """Numeric leaves of a result as {"a.b.c": number}."""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    return {prefix: value} if isinstance(value, (int, float)) else {}
+
+
+def compare(previous, current):
+    """Print every metric that both runs have, with the relative change."""
+    before = _flatten(previous.get("results", {}))
+    after = _flatten(current.get("results", {}))
+    print(f"\nCompared with {previous.get('meta', {}).get('commit') or 'previous run'}:")
+    for name, value in after.items():
+        if name in before and before[name]:
+            change = (value - before[name]) / before[name]
+            print(f"  {name:<50}{before[name]:>14,.3f}{value:>14,.3f}{change:>+9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="queuectl benchmark suite")
+    parser.add_argument("--url", help="Existing Redis to run against (scratch keys are removed afterwards)")
+    parser.add_argument("--scale", choices=sorted(SIZES), default="small")
+    parser.add_argument("--only", help="Comma-separated cases to run: " + ", ".join(CASES))
+    parser.add_argument("--workers", default="1,2,4", help="Worker process counts for end_to_end")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs each worker runs at once in end_to_end")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Promote batch size for delayed_drain")
+    parser.add_argument("--encoding", choices=["full", "compact"], default="full", help="Job hash encoding")
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        stop = None
+        backend = "external"
+        url = args.url
+        if url is None:
+            url, stop, backend = _start_server(directory)
+        try:
+            client = RedisConnection.get_client(url)
+            options = {
+                "url": url,
+                "workers": [int(w) for w in args.workers.split(",")],
+                "concurrency": args.concurrency,
+                "batch_size": args.batch_size,
+                "compact": args.encoding == "compact",
+            }
+            report = {"meta": _metadata(client, backend, args.scale, args.encoding), "results": {}}
+            for name in names:
+                print(f"[BENCH] {name} ...", flush=True)
+                result = CASES[name](client, SIZES[args.scale][name], options)
+                report["results"][name] = result
+                print(json.dumps(result, indent=2))
+        finally:
+            if stop is not None:
+                stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
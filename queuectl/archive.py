@@ -0,0 +1,80 @@
+# archive.py
+# Finished job records moved out of Redis by the retention compactor, kept as
+# gzip-compressed JSONL segments on local disk (one segment per UTC day).
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+
+def default_archive_dir():
+    return Path(__file__).parent / "data" / "archive"
+
+
+class Archive:
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else default_archive_dir()
+
+    def _segment(self, day):
+        return self.directory / f"jobs-{day}.jsonl.gz"
+
+    def write(self, records):
+        """
+        Append job records (job hash dicts) to today's segment. Each call adds
+        one gzip member, so a segment stays readable even if a later write is
+        cut short. Returns the number of records written.
+        """
+        if not records:
+            return 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        archived_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        lines = "".join(json.dumps({**record, "archived_at": archived_at}) + "\n" for record in records)
+        with open(self._segment(archived_at[:10]), "ab") as f:
+            f.write(gzip.compress(lines.encode("utf-8")))
+            f.flush()
+            os.fsync(f.fileno())
+        return len(records)
+
+    def segments(self, since=None, until=None):
+        """Segment files in date order, limited to days between since and until (YYYY-MM-DD)."""
+        if not self.directory.is_dir():
+            return []
+        paths = []
+        for path in sorted(self.directory.glob("jobs-*.jsonl.gz")):
+            day = path.name[len("jobs-"):-len(".jsonl.gz")]
+            if (since and day < since[:10]) or (until and day > until[:10]):
+                continue
+            paths.append(path)
+        return paths
+
+    def query(self, job_id=None, state=None, queue=None, contains=None, since=None, until=None, limit=100):
+        """
+        Yield archived records matching every given filter, oldest segment
+        first: exact job id, state, queue, a substring of the command, and a
+        range of archive days. Stops after limit records (None = no limit).
+        """
+        found = 0
+        for path in self.segments(since, until):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if job_id and record.get("id") != job_id:
+                            continue
+                        if state and record.get("state", "").upper() != state.upper():
+                            continue
+                        if queue and record.get("queue", "default") != queue:
+                            continue
+                        if contains and contains not in record.get("command", ""):
+                            continue
+                        yield record
+                        found += 1
+                        if limit is not None and found >= limit:
+                            return
+            except (OSError, EOFError) as e:
+                # A truncated last member; everything before it was yielded
+                print(f"[ERROR] Could not read all of {path.name}: {e}")
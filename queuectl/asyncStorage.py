@@ -0,0 +1,94 @@
+# asyncStorage.py
+# Read-only asyncio counterpart of Storage for the API server. Every call
+# awaits Redis on the shared connection pool, so a slow query never blocks the
+# event loop and other requests keep being served.
+import time
+
+import queuectl.metrics as metrics
+from queuectl.models import DEFAULT_QUEUE, decode_job
+from queuectl.redisConnection import RedisConnection
+from queuectl.storage import StorageKeys
+
+
+class AsyncStorage(StorageKeys):
+    def __init__(self, namespace="queuectl", client=None):
+        super().__init__(namespace)
+        self._client = client or RedisConnection.get_async_client()
+
+    async def getData(self, job_id):
+        return decode_job(await self._client.hgetall(self.getKey(job_id)), job_id)
+
+    async def getSummary(self):
+        """Job counts per state, read from the counters kept by the state scripts."""
+        counts = await self._client.hgetall(f"{self.ns}:counts")
+        return {state: int(n) for state, n in counts.items() if int(n) > 0}
+
+    async def getQueueSummary(self):
+        """Job counts per state for every queue that has seen a job, {queue: {state: n}}."""
+        queues = sorted(await self._client.smembers(f"{self.ns}:queues") | {DEFAULT_QUEUE})
+        pipe = self._client.pipeline(transaction=False)
+        for queue in queues:
+            pipe.hgetall(f"{self.ns}:counts:{queue}")
+        return {
+            queue: {state: int(n) for state, n in counts.items() if int(n) > 0}
+            for queue, counts in zip(queues, await pipe.execute())
+        }
+
+    async def listJobsPage(self, state=None, cursor=0, limit=100, order="desc", batch_size=500, queue=None):
+        """Same as Storage.listJobsPage."""
+        cursor = max(int(cursor or 0), 0)
+        limit = max(int(limit), 1)
+        index_key = self.getIndexKey(state, queue)
+
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zrange(index_key, cursor, cursor + limit - 1, desc=(order != "asc"))
+        pipe.zcard(index_key)
+        job_ids, total = await pipe.execute()
+
+        next_cursor = cursor + len(job_ids)
+        return {
+            "jobs": await self._getMany(job_ids, batch_size=batch_size),
+            "next_cursor": next_cursor if next_cursor < total else None,
+            "total": total,
+        }
+
+    async def _getMany(self, job_ids, batch_size=500):
+        jobs = []
+        for i in range(0, len(job_ids), batch_size):
+            pipe = self._client.pipeline(transaction=False)
+            for job_id in job_ids[i:i + batch_size]:
+                pipe.hgetall(self.getKey(job_id))
+            jobs.extend(decode_job(data, job_id)
+                        for job_id, data in zip(job_ids[i:i + batch_size], await pipe.execute()) if data)
+        return jobs
+
+    async def readJobLog(self, job_id, last_id="0", count=None):
+        """Log entries after last_id as [(entry_id, {"stream", "data"}), ...]."""
+        result = await self._client.xread({self.getLogKey(job_id): last_id}, count=count)
+        return result[0][1] if result else []
+
+    async def list_workers(self):
+        """Registered workers, each with its last heartbeat."""
+        worker_ids = list(await self._client.smembers(f"{self.ns}:workers:active"))
+        pipe = self._client.pipeline(transaction=False)
+        for worker_id in worker_ids:
+            pipe.hgetall(f"{self.ns}:worker:{worker_id}")
+            pipe.zscore(f"{self.ns}:workers:heartbeat", worker_id)
+        results = await pipe.execute()
+        workers = []
+        for worker_data, last_heartbeat in zip(results[::2], results[1::2]):
+            if worker_data:
+                if last_heartbeat is not None:
+                    worker_data["last_heartbeat"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(last_heartbeat))
+                workers.append(worker_data)
+        return workers
+
+    async def getMetrics(self):
+        """All recorded metrics in Prometheus text format."""
+        return metrics.render(await self._client.hgetall(f"{self.ns}:metrics"))
+
+    async def subscribeEvents(self):
+        """Async pub/sub handle receiving every job state transition (see Storage.subscribeEvents)."""
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.getEventsChannel())
+        return pubsub
@@ -1,9 +1,166 @@
 import argparse
 import json
-from queuectl.models import Job
-from queuectl.worker import WorkerManager
+import re
+import sys
+import time
+import uuid
+from queuectl.models import Job, DEFAULT_QUEUE
+from queuectl.worker import WorkerManager, WorkerStats
+from queuectl.profiler import MODES as PROFILE_MODES
+from queuectl.executor import CALLABLE_RE, parse_args
 from queuectl.scheduler import SchedulerQueue
 from queuectl.dlq import DLQ
+from queuectl.archive import Archive
+from queuectl.retention import Retention
+from queuectl.config import parse_weights
+import queuectl.jobState as jobState
+
+# States in which a job may still produce output
+ACTIVE_STATES = {
+    jobState.JobState.PENDING.value,
+    jobState.JobState.PROCESSING.value,
+    jobState.JobState.DELAYED.value,
+    jobState.JobState.WAITING.value,
+}
+
+def _key_name(value):
+    """argparse type for queue and tag names, which end up inside Redis key names."""
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", value):
+        raise argparse.ArgumentTypeError(f"invalid name {value!r} (use letters, digits, '_', '.' or '-')")
+    return value
+
+
+def _queue_weights(value):
+    """argparse type for "queue:weight,queue:weight" lists."""
+    queues = parse_weights(value)
+    for name in queues:
+        _key_name(name)
+    return queues
+
+
+def _callable(value):
+    """argparse type for "module:function" references of python jobs."""
+    if not CALLABLE_RE.fullmatch(value):
+        raise argparse.ArgumentTypeError(f"invalid callable {value!r} (use module.path:function)")
+    return value
+
+
+def _json_args(value):
+    """argparse type for a python job's JSON args, kept as the JSON text."""
+    try:
+        parse_args(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid args: {e}")
+    return value
+
+
+def _utc(epoch):
+    """Epoch seconds as an ISO-8601 UTC timestamp."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+def _line_number(job, name, default, kind):
+    """A non-negative int or float field of a JSONL job, as the CLI flag would accept it."""
+    if name not in job:
+        return default
+    value = job[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"field {name!r} must be a number")
+    try:
+        number = kind(value)
+    except ValueError:
+        raise ValueError(f"field {name!r} must be a number")
+    if number < 0 or (kind is int and isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"field {name!r} must be a non-negative {'integer' if kind is int else 'number'}")
+    return number
+
+
+def _line_options(job, defaults):
+    """
+    Job.new keyword arguments for a JSONL job object, checked with the same
+    rules as the matching enqueue flags. Raises ValueError naming the bad field.
+    """
+    options = {
+        "max_retries": _line_number(job, "max_retries", defaults["max_retries"], int),
+        "timeout_seconds": _line_number(job, "timeout_seconds", defaults["timeout_seconds"], float),
+        "cpu_limit": _line_number(job, "cpu_limit", defaults["cpu_limit"], int),
+        "memory_limit": _line_number(job, "memory_limit", defaults["memory_limit"], int),
+    }
+    priority = job.get("priority", defaults["priority"])
+    if priority not in [p.value for p in jobState.JobPriority]:
+        raise ValueError(f"field 'priority' must be one of {', '.join(p.value for p in jobState.JobPriority)}")
+    options["priority"] = priority
+    for name in ("queue", "tag"):
+        value = job.get(name, defaults[name])
+        if not isinstance(value, str):
+            raise ValueError(f"field {name!r} must be a string")
+        # An empty tag means none; a queue always needs a name
+        if name == "tag" and value == "":
+            options[name] = value
+            continue
+        try:
+            options[name] = _key_name(value)
+        except argparse.ArgumentTypeError as e:
+            raise ValueError(f"field {name!r}: {e}")
+    job_id = job.get("id")
+    if job_id is not None and (not isinstance(job_id, str) or not job_id or "," in job_id):
+        raise ValueError("field 'id' must be a non-empty string without commas")
+    depends_on = job.get("depends_on", [])
+    if (not isinstance(depends_on, list)
+            or not all(isinstance(d, str) and d and "," not in d for d in depends_on)):
+        raise ValueError("field 'depends_on' must be a list of job ids")
+    if job_id is not None and job_id in depends_on:
+        raise ValueError("field 'depends_on' lists the job itself")
+    options["job_id"] = job_id
+    options["depends_on"] = depends_on
+    return options
+
+
+def _read_jobs(lines, defaults):
+    """
+    Yield Jobs from JSONL lines, skipping (and reporting) invalid ones.
+    A line has either a shell "command" or a python "call" ("module:function")
+    with optional "args", and optionally an "id" and the "depends_on" ids of
+    jobs that must complete first. defaults maps Job.new keyword arguments to the
+    values used when a line leaves them out.
+    """
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"[ERROR] Line {lineno}: invalid JSON, skipped")
+            continue
+        if not isinstance(job, dict):
+            print(f"[ERROR] Line {lineno}: job must be a JSON object, skipped")
+            continue
+        try:
+            options = _line_options(job, defaults)
+        except ValueError as e:
+            print(f"[ERROR] Line {lineno}: {e}, skipped")
+            continue
+        if "call" in job:
+            if not isinstance(job["call"], str) or not CALLABLE_RE.fullmatch(job["call"]):
+                print(f"[ERROR] Line {lineno}: field 'call' must look like module.path:function, skipped")
+                continue
+            args = job.get("args", [])
+            if not isinstance(args, (list, dict)):
+                print(f"[ERROR] Line {lineno}: field 'args' must be a list or an object, skipped")
+                continue
+            yield Job.new(
+                command=job["call"],
+                kind=jobState.JobKind.PYTHON.value,
+                args=json.dumps(args) if args else "",
+                **options
+            )
+            continue
+        if not isinstance(job.get("command"), str) or not job["command"].strip():
+            print(f"[ERROR] Line {lineno}: field 'command' must be a non-empty string, skipped")
+            continue
+        yield Job.new(command=job["command"], **options)
+
 
 def build_cli(storage, config):
 
@@ -16,26 +173,142 @@ def build_cli(storage, config):
 
         sub = parser.add_subparsers(dest="cmd", required=True)
 
+        # Job options shared by enqueue and cron add
+        job_opts = argparse.ArgumentParser(add_help=False)
+        job_opts.add_argument("--args", type=_json_args, default="",
+                              help="JSON arguments for --call: a list (positional) or an object (keywords)")
+        # None leaves it to the max_retries config when the job is enqueued
+        job_opts.add_argument("--max-retries", type=int, default=None,
+                              help="Maximum retry attempts (default: max_retries config)")
+        # None leaves it to the job_timeout config when the job is enqueued
+        job_opts.add_argument("--timeout", type=float, default=None,
+                              help="Kill the job after this many seconds (0 = no limit, default: job_timeout config)")
+        job_opts.add_argument("--cpu-limit", type=int, default=0, help="CPU seconds the job may use (0 = no limit)")
+        job_opts.add_argument("--memory-limit", type=int, default=0,
+                              help="Address space in MiB the job may use (0 = no limit)")
+        job_opts.add_argument("--priority", choices=[p.value for p in jobState.JobPriority],
+                              default=jobState.JobPriority.NORMAL.value, help="Job priority")
+        job_opts.add_argument("--queue", "-q", type=_key_name, default=DEFAULT_QUEUE, help="Queue to put the job on")
+        job_opts.add_argument("--tag", type=_key_name, default=None, help="Job type, for limits shared across queues")
+
         # ========== ENQUEUE ==========
-        enq = sub.add_parser("enqueue", help="Add a job to the queue")
-        enq.add_argument("--command", "-c", required=True, help="The command to execute")
-        # Get default max_retries from config
-        default_max_retries = config.get("max_retries")
-        if isinstance(default_max_retries, str):
-            default_max_retries = int(default_max_retries)
-        elif default_max_retries is None:
-            default_max_retries = 3
-        else:
-            default_max_retries = int(default_max_retries)
-        enq.add_argument("--max-retries", type=int, default=default_max_retries, help="Maximum retry attempts")
+        enq = sub.add_parser("enqueue", help="Add a job to the queue", parents=[job_opts])
+        enq_src = enq.add_mutually_exclusive_group(required=True)
+        enq_src.add_argument("--command", "-c", help="The command to execute")
+        enq_src.add_argument("--call", type=_callable,
+                             help="Python function to call in a worker's executor pool, as module.path:function")
+        enq_src.add_argument("--file", "-f", help="Bulk enqueue jobs from a JSONL file (one job object per line)")
+        enq_src.add_argument("--stdin", action="store_true", help="Bulk enqueue JSONL jobs read from stdin")
+        enq.add_argument("--chunk-size", type=int, default=1000, help="Jobs written per Redis call when bulk enqueueing")
+        enq.add_argument("--depends-on", type=lambda v: [d.strip() for d in v.split(",") if d.strip()], default=[],
+                         help="Comma-separated ids of jobs that must complete before this one runs")
+        enq.add_argument("--workflow", action="store_true",
+                         help="Read the whole file first and enqueue it as one dependency graph, "
+                              "in any line order (checks for cycles)")
 
 
         # ========== WORKER ==========
         wk = sub.add_parser("worker", help="Start or stop workers")
-        wk.add_argument("action", choices=["start", "stop", "list"], help="Action to perform")
+        wk.add_argument("action", choices=["start", "stop", "list", "reap", "stats"], help="Action to perform")
         wk.add_argument("--count", type=int, default=1, help="Number of worker processes (for start)")
         wk.add_argument("--pid", type=int, help="Stop a specific worker by PID")
         wk.add_argument("--all", action="store_true", help="Stop all workers")
+        # Blocking fetch timeout from config (0 = poll with LPOP instead of blocking)
+        default_block_timeout = config.get("fetch_block_timeout")
+        if default_block_timeout is None:
+            default_block_timeout = 5
+        wk.add_argument("--block-timeout", type=float, default=float(default_block_timeout),
+                        help="Seconds a worker blocks waiting for a job (0 = poll)")
+        wk.add_argument("--concurrency", type=int, default=1,
+                        help="Jobs each worker process runs at once (for start)")
+        # Heartbeat settings from config
+        default_heartbeat_interval = config.get("heartbeat_interval")
+        if default_heartbeat_interval is None:
+            default_heartbeat_interval = 5
+        default_heartbeat_timeout = config.get("heartbeat_timeout")
+        if default_heartbeat_timeout is None:
+            default_heartbeat_timeout = 30
+        wk.add_argument("--heartbeat-interval", type=float, default=float(default_heartbeat_interval),
+                        help="Seconds between worker heartbeats (for start)")
+        default_log_max_bytes = config.get("log_max_bytes")
+        if default_log_max_bytes is None:
+            default_log_max_bytes = 1048576
+        default_priority_weights = config.get("priority_weights")
+        if default_priority_weights is None:
+            default_priority_weights = "high:6,normal:3,low:1"
+        wk.add_argument("--priority-weights", type=parse_weights, default=parse_weights(default_priority_weights),
+                        help="Share of claims per priority while all have work, e.g. high:6,normal:3,low:1 (for start)")
+        wk.add_argument("--queues", type=_queue_weights, default={DEFAULT_QUEUE: 1},
+                        help="Queues to serve and their share of claims, e.g. emails:5,reports:1 (for start)")
+        wk.add_argument("--log-max-bytes", type=int, default=int(default_log_max_bytes),
+                        help="Output bytes kept per job attempt (for start)")
+        wk.add_argument("--heartbeat-timeout", type=float, default=float(default_heartbeat_timeout),
+                        help="Seconds without a heartbeat before a worker is reaped (for reap)")
+        wk.add_argument("--python-pool", type=int, default=0,
+                        help="Executor processes per worker for python jobs, default one per --concurrency slot (for start)")
+        wk.add_argument("--preload", type=lambda v: [m.strip() for m in v.split(",") if m.strip()],
+                        help="Modules to import in the executor processes at start, e.g. myapp.tasks (for start)")
+        wk.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Sample each worker with cProfile (cpu) or tracemalloc (memory) (for start)")
+        wk.add_argument("--profile-interval", type=float, default=300,
+                        help="Seconds between profile reports (for start)")
+        wk.add_argument("--profile-window", type=float, default=10,
+                        help="Seconds profiled for each report (for start)")
+        wk.add_argument("--profile-dir", help="Directory for profile reports, default queuectl/data/profiles (for start)")
+
+        # ========== SCHEDULER ==========
+        sch = sub.add_parser("scheduler", help="Run the delayed-job scheduler")
+        sch.add_argument("action", choices=["run"], help="Action to perform")
+        sch.add_argument("--lease-ttl", type=float, default=10,
+                         help="Seconds the leader lease lasts without renewal")
+        default_batch_size = config.get("promote_batch_size")
+        if default_batch_size is None:
+            default_batch_size = 1000
+        sch.add_argument("--batch-size", type=int, default=int(default_batch_size),
+                         help="Most delayed jobs promoted per Redis call")
+        sch.add_argument("--heartbeat-timeout", type=float, default=float(default_heartbeat_timeout),
+                         help="Seconds without a heartbeat before a worker is reaped")
+        default_compact_interval = config.get("compact_interval")
+        if default_compact_interval is None:
+            default_compact_interval = 60
+        sch.add_argument("--compact-interval", type=float, default=float(default_compact_interval),
+                         help="Seconds between retention passes (policy from config retention_max_age/retention_max_count)")
+
+        # ========== ARCHIVE ==========
+        arc = sub.add_parser("archive", help="Apply the retention policy or search archived jobs")
+        arc.add_argument("action", choices=["compact", "query"], help="Action to perform")
+        arc.add_argument("--id", help="Only the job with this ID (for query)")
+        arc.add_argument("--state", help="Only jobs in this state (for query)")
+        arc.add_argument("--queue", "-q", help="Only jobs from this queue (for query)")
+        arc.add_argument("--contains", help="Only jobs whose command contains this text (for query)")
+        arc.add_argument("--since", help="Archived on or after this day, YYYY-MM-DD (for query)")
+        arc.add_argument("--until", help="Archived on or before this day, YYYY-MM-DD (for query)")
+        arc.add_argument("--limit", type=int, default=100, help="Maximum number of jobs to show (for query)")
+
+        # ========== LIMIT ==========
+        lim = sub.add_parser("limit", help="Rate limits and concurrency caps per queue or tag")
+        lim.add_argument("action", choices=["set", "list", "clear"], help="Action to perform")
+        lim_scope = lim.add_mutually_exclusive_group()
+        lim_scope.add_argument("--queue", "-q", type=_key_name, help="Limit a queue")
+        lim_scope.add_argument("--tag", type=_key_name, help="Limit every job with this tag")
+        lim.add_argument("--rate", type=float, help="Jobs started per second (0 = no rate limit)")
+        lim.add_argument("--burst", type=float, help="Jobs that may start back to back (default: one second's worth)")
+        lim.add_argument("--concurrency", type=int, help="Jobs running at once (0 = no cap)")
+
+        # ========== CRON ==========
+        cron = sub.add_parser("cron", help="Recurring jobs on cron schedules (run by the scheduler)")
+        cron_sub = cron.add_subparsers(dest="cron_action", required=True)
+        cron_add = cron_sub.add_parser("add", parents=[job_opts],
+                                       help="Create or replace a schedule")
+        cron_add.add_argument("expr", help='Cron expression in UTC, e.g. "*/5 * * * *" or @daily')
+        cron_add.add_argument("--name", "-n", type=_key_name,
+                              help="Schedule name, also the prefix of its job ids (default: random)")
+        cron_src = cron_add.add_mutually_exclusive_group(required=True)
+        cron_src.add_argument("--command", "-c", help="The command to execute")
+        cron_src.add_argument("--call", type=_callable, help="Python function to call, as module.path:function")
+        cron_sub.add_parser("list", help="List schedules and their next fire times")
+        cron_rm = cron_sub.add_parser("remove", help="Delete a schedule")
+        cron_rm.add_argument("name", help="Schedule name")
 
         # ========== STATUS ==========
         st = sub.add_parser("status", help="Show queue summary")
@@ -43,6 +316,18 @@ def build_cli(storage, config):
         # ========== LIST ==========
         lst = sub.add_parser("list", help="List jobs in queue")
         lst.add_argument("--state", help="Filter jobs by state (pending, processing, dead, delayed)")
+        lst.add_argument("--limit", type=int, default=100, help="Maximum number of jobs to show")
+        lst.add_argument("--cursor", type=int, default=0, help="Cursor returned by the previous page")
+        lst.add_argument("--order", choices=["desc", "asc"], default="desc", help="Sort by update time")
+        lst.add_argument("--queue", "-q", type=_key_name, help="Only list jobs on this queue")
+
+        # ========== LOGS ==========
+        lg = sub.add_parser("logs", help="Show a job's captured output")
+        lg.add_argument("job_id", help="Job ID")
+        lg.add_argument("--follow", "-f", action="store_true", help="Keep streaming output until the job finishes")
+
+        # ========== REINDEX ==========
+        sub.add_parser("reindex", help="Rebuild state indexes and counters from job hashes")
 
         # ========== DLQ ==========
         dlq = sub.add_parser("dlq", help="Dead Letter Queue operations")
@@ -50,8 +335,9 @@ def build_cli(storage, config):
         dlq.add_argument("job_id", nargs="?", help="Job ID required when retrying a job")
 
         # ========== CONFIG ==========
-        cfg = sub.add_parser("config", help="Update config file")
+        cfg = sub.add_parser("config", help="Show or update the shared config")
         cfg_sub = cfg.add_subparsers(dest="config_action", required=True)
+        cfg_sub.add_parser("show", help="Show every config value and the config version")
         cfg_set = cfg_sub.add_parser("set", help="Set config key and value")
         cfg_set.add_argument("key", help="Config key to set")
         cfg_set.add_argument("value", help="Config value to set")
@@ -62,11 +348,40 @@ def build_cli(storage, config):
         # COMMAND HANDLER
         # =============================================================
         try:
-            if args.cmd == "enqueue":
+            if args.cmd == "enqueue" and (args.file or args.stdin):
+                source = open(args.file, "r") if args.file else sys.stdin
+                try:
+                    start = time.perf_counter()
+                    jobs = _read_jobs(source, {
+                        "max_retries": args.max_retries,
+                        "timeout_seconds": args.timeout,
+                        "cpu_limit": args.cpu_limit,
+                        "memory_limit": args.memory_limit,
+                        "priority": args.priority,
+                        "queue": args.queue,
+                        "tag": args.tag or "",
+                    })
+                    if args.workflow:
+                        try:
+                            count = storage.enqueue_workflow(list(jobs), chunk_size=args.chunk_size)
+                        except ValueError as e:
+                            print(f"[ERROR] {e}")
+                            return
+                    else:
+                        count = storage.enqueue_many(jobs, chunk_size=args.chunk_size)
+                    elapsed = time.perf_counter() - start
+                finally:
+                    if args.file:
+                        source.close()
+                rate = count / elapsed if elapsed > 0 else 0
+                print(f"[OK] Enqueued {count} job(s) in {elapsed:.2f}s ({rate:,.0f} jobs/sec)")
+
+            elif args.cmd == "enqueue":
             # STEP 1 — JSON Validation
                 try:
                     job = {
-                    "command": args.command,
+                    "command": args.call or args.command,
+                    "kind": jobState.JobKind.PYTHON.value if args.call else jobState.JobKind.SHELL.value,
                     "max_retries": args.max_retries
                     }
                     # Enqueue it
@@ -93,7 +408,16 @@ def build_cli(storage, config):
                 # Everything is OK → enqueue job
                 jobObj = Job.new(
                     command=job["command"],
-                    max_retries=job["max_retries"]
+                    kind=job["kind"],
+                    args=args.args,
+                    max_retries=job["max_retries"],
+                    timeout_seconds=args.timeout,
+                    cpu_limit=args.cpu_limit,
+                    memory_limit=args.memory_limit,
+                    priority=args.priority,
+                    queue=args.queue,
+                    tag=args.tag or "",
+                    depends_on=args.depends_on
                 )
                 storage.enqueue(jobObj)
                 print("[OK] Job enqueued successfully:", jobObj)
@@ -106,7 +430,18 @@ def build_cli(storage, config):
 
                 if args.action == "start":
                     print(f"[START] Starting {args.count} workers...")
-                    manager.start(count=args.count)
+                    manager.start(count=args.count, block_timeout=args.block_timeout,
+                                  concurrency=args.concurrency,
+                                  heartbeat_interval=args.heartbeat_interval,
+                                  log_max_bytes=args.log_max_bytes,
+                                  priority_weights=args.priority_weights,
+                                  queues=args.queues,
+                                  profile=args.profile,
+                                  profile_interval=args.profile_interval,
+                                  profile_window=args.profile_window,
+                                  profile_dir=args.profile_dir,
+                                  python_pool=args.python_pool,
+                                  preload=args.preload)
                 elif args.action == "list":
                     workers = manager.list_workers()
                     if not workers:
@@ -117,7 +452,29 @@ def build_cli(storage, config):
                             worker_id = worker.get("worker_id", "?")
                             pid = worker.get("pid", "?")
                             started_at = worker.get("started_at", "?")
-                            print(f"  Worker {worker_id}: PID {pid}, Started: {started_at}")
+                            last_heartbeat = worker.get("last_heartbeat", "?")
+                            print(f"  Worker {worker_id}: PID {pid}, Started: {started_at}, Last heartbeat: {last_heartbeat}")
+                elif args.action == "stats":
+                    workers = manager.list_workers()
+                    if not workers:
+                        print("[STATS] No workers running")
+                    for worker in sorted(workers, key=lambda w: int(w.get("worker_id", 0))):
+                        phases = WorkerStats.parse(worker)
+                        jobs = phases.get("run", (0, 0, 0))[0]
+                        total = sum(seconds for _, seconds, _ in phases.values())
+                        print(f"[STATS] Worker {worker.get('worker_id', '?')} (PID {worker.get('pid', '?')}): "
+                              f"{jobs} job(s), as of last heartbeat {worker.get('last_heartbeat', '?')}")
+                        if not phases:
+                            print("  No timings reported yet")
+                            continue
+                        print(f"  {'phase':<12}{'count':>10}{'total s':>12}{'avg ms':>10}{'max ms':>10}{'share':>8}")
+                        for phase, (count, seconds, longest) in phases.items():
+                            avg = seconds / count * 1000 if count else 0
+                            share = seconds / total if total else 0
+                            print(f"  {phase:<12}{count:>10}{seconds:>12.2f}{avg:>10.2f}{longest * 1000:>10.2f}{share:>8.1%}")
+                elif args.action == "reap":
+                    reaped = manager.reap(args.heartbeat_timeout)
+                    print(f"[REAP] Reaped {len(reaped)} dead worker(s)")
                 else:  # stop
                     if args.pid:
                         print(f"[STOP] Stopping worker with PID {args.pid}...")
@@ -131,15 +488,149 @@ def build_cli(storage, config):
 
             # -----------------------
 
+            elif args.cmd == "scheduler":
+                scheduler = SchedulerQueue(storage=storage, lease_ttl=args.lease_ttl,
+                                           batch_size=args.batch_size,
+                                           heartbeat_timeout=args.heartbeat_timeout,
+                                           retention=Retention.from_config(storage, config),
+                                           compact_interval=args.compact_interval)
+                print("[SCHEDULER] Running (Ctrl+C to stop)...")
+                try:
+                    scheduler.run()
+                except KeyboardInterrupt:
+                    scheduler.stop()
+                print("[SCHEDULER] Stopped")
+
+            # -----------------------
+
+            elif args.cmd == "limit":
+                if args.action == "list":
+                    limits = storage.listLimits()
+                    if not limits:
+                        print("[LIMIT] No limits set")
+                    for scope, limit in limits.items():
+                        print(f"  {scope}: rate {limit['rate']:g}/s, burst {limit['burst']:g}, "
+                              f"concurrency {limit['concurrency'] or 'unlimited'} ({limit['active']} running)")
+                    return
+                if not args.queue and not args.tag:
+                    print("[ERROR] Pass --queue or --tag")
+                    return
+                scope = f"queue:{args.queue}" if args.queue else f"tag:{args.tag}"
+                if args.action == "set":
+                    if args.rate is None and args.burst is None and args.concurrency is None:
+                        print("[ERROR] Pass at least one of --rate, --burst or --concurrency")
+                        return
+                    storage.setLimit(scope, rate=args.rate, burst=args.burst, concurrency=args.concurrency)
+                    print(f"[LIMIT] Updated {scope}")
+                else:  # clear
+                    storage.clearLimit(scope)
+                    print(f"[LIMIT] Cleared {scope}")
+
+            # -----------------------
+
+            elif args.cmd == "cron":
+                if args.cron_action == "add":
+                    name = args.name or uuid.uuid4().hex[:8]
+                    job = Job.new(
+                        command=args.call or args.command,
+                        kind=jobState.JobKind.PYTHON.value if args.call else jobState.JobKind.SHELL.value,
+                        args=args.args,
+                        max_retries=args.max_retries,
+                        timeout_seconds=args.timeout,
+                        cpu_limit=args.cpu_limit,
+                        memory_limit=args.memory_limit,
+                        priority=args.priority,
+                        queue=args.queue,
+                        tag=args.tag or ""
+                    )
+                    try:
+                        next_at = storage.setCron(name, args.expr, job)
+                    except ValueError as e:
+                        print(f"[ERROR] {e}")
+                        return
+                    print(f"[CRON] Saved schedule {name}, next run at {_utc(next_at)}")
+                elif args.cron_action == "list":
+                    schedules = storage.listCrons()
+                    if not schedules:
+                        print("[CRON] No schedules")
+                    for schedule in schedules:
+                        last = _utc(float(schedule["last_at"])) if schedule.get("last_at") else "never"
+                        print(f"  {schedule['name']}: {schedule.get('expr')} -> {schedule.get('command')} "
+                              f"(queue {schedule.get('queue')}, next {_utc(schedule['next_at'])}, last {last})")
+                else:  # remove
+                    if storage.removeCron(args.name):
+                        print(f"[CRON] Removed schedule {args.name}")
+                    else:
+                        print(f"[ERROR] Schedule {args.name} not found")
+
+            # -----------------------
+
             elif args.cmd == "status":
                 summary = storage.getSummary()
                 print("[STATUS] Queue Summary:", summary)
+                for queue, counts in storage.getQueueSummary().items():
+                    print(f"  {queue}: {counts}")
 
             # -----------------------
 
             elif args.cmd == "list":
-                jobs = storage.listJobs(state=args.state)
-                print("[LIST] Jobs:", jobs)
+                page = storage.listJobsPage(state=args.state, cursor=args.cursor,
+                                            limit=args.limit, order=args.order, queue=args.queue)
+                print("[LIST] Jobs:", page["jobs"])
+                print(f"[LIST] Showing {len(page['jobs'])} of {page['total']} job(s)")
+                if page["next_cursor"] is not None:
+                    print(f"[LIST] Next page: --cursor {page['next_cursor']}")
+
+            # -----------------------
+
+            elif args.cmd == "logs":
+                if not storage.getData(args.job_id):
+                    print(f"[ERROR] Job {args.job_id} not found")
+                    return
+                last_id = "0"
+                while True:
+                    entries = storage.readJobLog(args.job_id, last_id=last_id,
+                                                 block=5000 if args.follow else None)
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        if fields.get("stream") == "meta":
+                            print(f"[LOGS] --- {fields.get('data')} ---")
+                        else:
+                            print(fields.get("data", ""), end="", flush=True)
+                    if not args.follow:
+                        break
+                    if not entries:
+                        # Nothing new for a while; stop once the job can no longer run
+                        state = (storage.getData(args.job_id) or {}).get("state")
+                        if state not in ACTIVE_STATES:
+                            break
+
+            # -----------------------
+
+            elif args.cmd == "archive":
+                if args.action == "compact":
+                    retention = Retention.from_config(storage, config)
+                    if retention is None:
+                        print("[ERROR] No retention policy; set retention_max_age and/or retention_max_count, "
+                              "e.g. queuectl config set retention_max_age completed:86400,dead:604800")
+                        return
+                    removed = retention.run()
+                    print("[ARCHIVE] Compacted:", removed)
+                else:  # query
+                    archive = Archive(config.get("archive_dir") or None)
+                    count = 0
+                    for record in archive.query(job_id=args.id, state=args.state, queue=args.queue,
+                                                contains=args.contains, since=args.since, until=args.until,
+                                                limit=args.limit):
+                        print(json.dumps(record))
+                        count += 1
+                    print(f"[ARCHIVE] {count} job(s) found")
+
+            # -----------------------
+
+            elif args.cmd == "reindex":
+                total = storage.rebuildIndexes()
+                print(f"[REINDEX] Indexed {total} job(s):", storage.getSummary())
 
             # -----------------------
 
@@ -162,9 +653,17 @@ def build_cli(storage, config):
                 if args.config_action == "set":
                     k = args.key
                     v = args.value
-                    config.set(k, v)
+                    try:
+                        config.set(k, v)
+                    except ValueError as e:
+                        print(f"[ERROR] {e}")
+                        return
                     config.save()
-                    print(f"[CONFIG] Updated config {k}={v}")
+                    print(f"[CONFIG] Updated config {k}={v} (version {config.version})")
+                else:  # show
+                    print(f"[CONFIG] Version {config.version or 0}")
+                    for k, v in sorted(config.values.items()):
+                        print(f"  {k} = {v}")
 
         except Exception as e:
             print("[ERROR] Unexpected error:", e)
@@ -2,8 +2,37 @@ import json
 from pathlib import Path
 
 
+def parse_weights(value, default_weight=1):
+    """
+    Parse "name:weight,name:weight" (or a dict) into {name: int weight}.
+    A name without ":weight" gets default_weight; weights below 1 are raised to 1.
+    """
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = []
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, _, weight = part.partition(":")
+            items.append((name.strip(), weight.strip() or default_weight))
+    return {name: max(int(weight), 1) for name, weight in items}
+
+
+# Spellings accepted for boolean settings
+BOOLEANS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+# Settings holding "name:weight,..." lists, and settings with a fixed set of values
+WEIGHT_KEYS = ("priority_weights", "retention_max_age", "retention_max_count")
+CHOICES = {"job_encoding": ("full", "compact")}
+
+
 class Config:
-    DEFAULTS = {"max_retries": 3, "backoff_base": 2}
+    DEFAULTS = {"max_retries": 3, "backoff_base": 2, "fetch_block_timeout": 5, "promote_batch_size": 1000,
+                "heartbeat_interval": 5, "heartbeat_timeout": 30, "log_max_bytes": 1048576,
+                "job_timeout": 0, "priority_weights": "high:6,normal:3,low:1",
+                "retention_max_age": "", "retention_max_count": "", "retention_archive": True,
+                "archive_dir": "", "compact_interval": 60, "job_encoding": "full"}
 
     @staticmethod
     def _get_config_path():
@@ -55,4 +84,115 @@ class Config:
 
 
     def get(self, k):
-        return self.values.get(k)
\ No newline at end of file
+        return self.values.get(k)
+
+    @classmethod
+    def parse(cls, k, v):
+        """
+        v as the type of DEFAULTS[k] (unknown keys stay as given). Raises
+        ValueError if it does not fit, e.g. "5s" for a number of seconds.
+        """
+        default = cls.DEFAULTS.get(k)
+        if isinstance(default, bool):
+            if isinstance(v, bool):
+                return v
+            if str(v).strip().lower() not in BOOLEANS:
+                raise ValueError(f"{k} must be true or false, got {v!r}")
+            return BOOLEANS[str(v).strip().lower()]
+        if isinstance(default, (int, float)):
+            try:
+                number = float(v)
+            except (TypeError, ValueError):
+                raise ValueError(f"{k} must be a number, got {v!r}")
+            if not 0 <= number < float("inf"):
+                raise ValueError(f"{k} must be a non-negative number, got {v!r}")
+            return int(number) if isinstance(default, int) and number.is_integer() else number
+        if k in WEIGHT_KEYS:
+            try:
+                parse_weights(v)
+            except ValueError:
+                raise ValueError(f"{k} must look like name:number,name:number, got {v!r}")
+        if k in CHOICES and v not in CHOICES[k]:
+            raise ValueError(f"{k} must be one of {', '.join(CHOICES[k])}, got {v!r}")
+        return v
+
+
+class RedisConfig(Config):
+    """
+    Config kept in the {ns}:config hash, so every host shares it. Values are
+    cached in process and fall back to DEFAULTS. set() bumps the
+    {ns}:config:version counter and publishes the new version on
+    {ns}:config:changed. Processes reload when refresh() is handed a version
+    other than the cached one, from that channel or from a version read
+    piggybacked on a write they send anyway (the worker heartbeat).
+    """
+
+    def __init__(self, client, namespace="queuectl"):
+        super().__init__(self.DEFAULTS.copy())
+        self._client = client
+        self.key = f"{namespace}:config"
+        self.version_key = f"{self.key}:version"
+        self.channel = f"{self.key}:changed"
+        self.version = None
+
+    def reload(self):
+        """Read every value and the version in one round trip. Returns self."""
+        pipe = self._client.pipeline()
+        pipe.hgetall(self.key)
+        pipe.get(self.version_key)
+        values, version = pipe.execute()
+        if version is None and not values:
+            values, version = self._importFile()
+        self.values = self.DEFAULTS.copy()
+        for k, v in values.items():
+            try:
+                self.values[k] = self.parse(k, v)
+            except ValueError as e:
+                # Never let one bad value stop every process from starting
+                print(f"[CONFIG] Ignoring invalid value: {e}; using the default {self.DEFAULTS[k]}")
+        self.version = version
+        return self
+
+    def _importFile(self):
+        """Seed the hash once from the config.json written by older versions, if there is one."""
+        if not self._get_config_path().exists():
+            return {}, None
+        values = {}
+        for k, v in Config.load().values.items():
+            try:
+                self.parse(k, v)
+            except ValueError as e:
+                print(f"[CONFIG] Not importing invalid value: {e}")
+                continue
+            values[k] = str(v)
+        pipe = self._client.pipeline()
+        for k, v in values.items():
+            pipe.hsetnx(self.key, k, v)
+        pipe.incr(self.version_key)
+        pipe.hgetall(self.key)
+        results = pipe.execute()
+        return results[-1], str(results[-2])
+
+    def refresh(self, version):
+        """Reload if version differs from the cached one. Returns True if it did."""
+        if version is None or str(version) == self.version:
+            return False
+        self.reload()
+        return True
+
+    def set(self, k, v):
+        """
+        Write a value for every process and notify them of the new version.
+        Raises ValueError for a value of the wrong type (see Config.parse).
+        """
+        self.parse(k, v)
+        pipe = self._client.pipeline()
+        pipe.hset(self.key, k, v)
+        pipe.incr(self.version_key)
+        version = pipe.execute()[1]
+        self._client.publish(self.channel, version)
+        self.reload()
+
+    def save(self, path=None):
+        """Nothing to do: set() writes through to Redis."""
+
@@ -0,0 +1,103 @@
+# cron.py
+# Five-field cron expressions ("minute hour day-of-month month day-of-week"),
+# evaluated in UTC like every other timestamp queuectl writes.
+from datetime import datetime, timedelta, timezone
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+DAY_NAMES = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+# Furthest ahead next_after looks before deciding an expression never fires
+SEARCH_YEARS = 5
+
+
+def _parse_field(text, low, high, names=None):
+    """Set of values a field matches; supports *, a-b, lists, /step and names."""
+    def value(token):
+        token = token.lower()
+        if names and token in names:
+            return names[token]
+        number = int(token)
+        if not low <= number <= high:
+            raise ValueError(f"{number} is outside {low}-{high}")
+        return number
+
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"invalid step in {part!r}")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (value(token) for token in spec.split("-", 1))
+        else:
+            start = value(spec)
+            end = high if "/" in part else start
+        if start > end:
+            raise ValueError(f"invalid range {spec!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """
+    A parsed cron expression. As in Vixie cron, when both day-of-month and
+    day-of-week are restricted a day matches if either does; Sunday is 0 or 7.
+    """
+
+    def __init__(self, expr):
+        self.expr = expr.strip()
+        fields = MACROS.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"invalid cron expression {expr!r} (expected 5 fields or an @macro)")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES)
+            self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7, DAY_NAMES)}
+        except ValueError as e:
+            raise ValueError(f"invalid cron expression {expr!r}: {e}")
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt):
+        day = dt.day in self.days
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, when):
+        """Epoch seconds of the first fire time strictly after epoch seconds when."""
+        dt = datetime.fromtimestamp(when, timezone.utc).replace(second=0, microsecond=0)
+        dt += timedelta(minutes=1)
+        last_year = dt.year + SEARCH_YEARS
+        # Skip whole months, days and hours that cannot match
+        while dt.year <= last_year:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron expression {self.expr!r} never fires")
+
+    def __str__(self):
+        return self.expr
@@ -1,5 +1,4 @@
 import queuectl.jobState as jobState
-from queuectl.models import Job
 class DLQ:
     def __init__(self, storage):
         self.storage = storage
@@ -11,11 +10,10 @@ class DLQ:
 
     def retry(self, job_id):
     # fetch job from DLQ -> reset attempts/state -> put back to pending
-        job = self.storage.getData(job_id)
+        job = self.storage.getJob(job_id)
         if not job:
             print(f"[ERROR] Job {job_id} not found in DLQ")
             return
-        job = Job(**job)
         job.attempts = 0
         job.state = jobState.JobState.PENDING.value
         self.storage.enqueue(job)
@@ -0,0 +1,140 @@
+# executor.py
+# Runs "module:function" jobs inside a pool of long-lived child processes, so a
+# Python job costs a pipe round trip instead of a fork, a shell and a fresh
+# interpreter. Imported modules stay cached in each child between jobs.
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import re
+import traceback
+
+# Largest JSON-encoded return value stored on a job
+RESULT_MAX_BYTES = 65536
+
+CALLABLE_RE = re.compile(r"[A-Za-z_][\w.]*:[A-Za-z_][\w.]*")
+
+
+def parse_args(args):
+    """(args, kwargs) from a job's JSON args: a list is positional, an object is keywords."""
+    if not args:
+        return [], {}
+    value = json.loads(args)
+    if isinstance(value, list):
+        return value, {}
+    if isinstance(value, dict):
+        return [], value
+    raise ValueError("args must be a JSON list or object")
+
+
+def resolve(ref):
+    """The object a "module:attr.attr" reference names, importing the module if needed."""
+    module_name, _, attrs = ref.partition(":")
+    target = importlib.import_module(module_name)
+    for attr in attrs.split("."):
+        target = getattr(target, attr)
+    return target
+
+
+def _child_main(conn, preload):
+    """Child loop: receive (ref, args), reply ("ok", result JSON, output) or ("error", message, output)."""
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"[Executor] Could not preload {module_name}: {type(e).__name__}: {e}")
+    while True:
+        try:
+            ref, args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                positional, keywords = parse_args(args)
+                result = json.dumps(resolve(ref)(*positional, **keywords), default=str)
+            if len(result) > RESULT_MAX_BYTES:
+                reply = ("error", f"result of {len(result)} bytes is over the {RESULT_MAX_BYTES} byte limit")
+            else:
+                reply = ("ok", result)
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                return
+            reply = ("error", f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=-5)}")
+        conn.send((*reply, output.getvalue()))
+
+
+class CallableExecutor:
+    """
+    Fixed pool of preforked child processes for Python callable jobs. Each job
+    takes an idle child, so at most `size` run at once. A child that times out
+    or dies is killed and replaced; the others keep their warm module cache.
+    Children are started with "spawn", so they never inherit the worker's
+    Redis connections or event loop.
+    """
+
+    def __init__(self, size, preload=()):
+        self.size = max(int(size), 1)
+        self.preload = tuple(preload)
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = None
+        self._children = []
+
+    def _spawn(self):
+        parent, child = self._context.Pipe()
+        proc = self._context.Process(target=_child_main, args=(child, self.preload), daemon=True)
+        proc.start()
+        child.close()
+        self._children.append(proc)
+        return proc, parent
+
+    def start(self):
+        """Prefork every child. Called on first use if not called before."""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(self._spawn())
+
+    async def run(self, ref, args="", timeout=None):
+        """
+        Call ref(*args) in a child. Returns (ok, result JSON or error message,
+        captured output). Raises asyncio.TimeoutError after timeout seconds.
+        """
+        self.start()
+        proc, conn = await self._idle.get()
+        healthy = False
+        try:
+            conn.send((ref, args))
+            if not await asyncio.to_thread(conn.poll, timeout):
+                raise asyncio.TimeoutError()
+            status, value, output = conn.recv()
+            healthy = True
+            return status == "ok", value, output
+        except asyncio.TimeoutError:
+            raise
+        except (EOFError, OSError):
+            return False, f"executor process exited with code {proc.exitcode}", ""
+        finally:
+            if not healthy:
+                self._discard(proc, conn)
+                proc, conn = self._spawn()
+            self._idle.put_nowait((proc, conn))
+
+    def _discard(self, proc, conn):
+        conn.close()
+        if proc.is_alive():
+            proc.kill()
+        proc.join(1)
+        self._children.remove(proc)
+
+    def close(self):
+        """Stop every child."""
+        for proc in list(self._children):
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(1)
+        self._children = []
+        self._idle = None
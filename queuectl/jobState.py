@@ -5,5 +5,17 @@ class JobState(Enum):
     PROCESSING = "PROCESSING"
     COMPLETED = "COMPLETED"
     DELAYED = "DELAYED"
+    WAITING = "WAITING"     # held until every job in depends_on has completed
     FAILED = "FAILED"
-    DEAD = "DEAD"
\ No newline at end of file
+    DEAD = "DEAD"
+
+
+class JobKind(Enum):
+    SHELL = "shell"     # command is run by /bin/sh
+    PYTHON = "python"   # command is a "module:function" called in the worker's executor pool
+
+
+class JobPriority(Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
@@ -0,0 +1,810 @@
+# luaScripts.py
+# Server-side scripts used by Storage. Each one is registered once per Storage
+# instance with register_script(), so every call after the first is an EVALSHA.
+
+# Key helpers shared by every script. The "default" queue keeps the original
+# {ns}:queue:* keys; any other queue lives under {ns}:queue:{name}:*. Each
+# priority has its own pending list, with "normal" on the bare pending key.
+QUEUE_KEYS = """
+local function queue_prefix(ns, queue)
+    if not queue or queue == '' or queue == 'default' then
+        return ns .. ':queue:'
+    end
+    return ns .. ':queue:' .. queue .. ':'
+end
+
+local function pending_key(ns, queue, priority)
+    local key = queue_prefix(ns, queue) .. 'pending'
+    if priority and priority ~= '' and priority ~= 'normal' then
+        key = key .. ':' .. priority
+    end
+    return key
+end
+
+local function signal_key(ns, queue)
+    return queue_prefix(ns, queue) .. 'signal'
+end
+"""
+
+# Job hash field access in either encoding (see models.COMPACT_FIELDS).
+# Compact hashes always hold the short state field 's', store updated_at as
+# whole epoch seconds and leave out empty fields. job_get returns the values of
+# the named fields (false when missing); job_set writes fields given by their
+# full names in the hash's own encoding, using score for a compact updated_at.
+JOB_FIELDS = """
+local compact_names = {
+    id = 'i', command = 'c', state = 's', attempts = 'a', max_retries = 'r',
+    created_at = 'C', updated_at = 'u', worker_id = 'w', timeout_seconds = 't',
+    cpu_limit = 'p', memory_limit = 'm', last_error = 'e', priority = 'P',
+    queue = 'q', tag = 'g', timings = 'T', kind = 'k', args = 'A', result = 'R',
+    depends_on = 'D', waiting_on = 'W',
+}
+
+local function job_get(job_key, ...)
+    local names = {...}
+    local query = {}
+    for i, name in ipairs(names) do
+        query[2 * i - 1] = name
+        query[2 * i] = compact_names[name]
+    end
+    local values = redis.call('HMGET', job_key, unpack(query))
+    local result = {}
+    for i = 1, #names do
+        result[i] = values[2 * i - 1] or values[2 * i]
+    end
+    return unpack(result, 1, #names)
+end
+
+local function job_set(job_key, score, ...)
+    local args = {...}
+    if redis.call('HEXISTS', job_key, 's') == 0 then
+        redis.call('HSET', job_key, unpack(args))
+        return
+    end
+    local set = {}
+    local unset = {}
+    for i = 1, #args, 2 do
+        local value = args[i + 1]
+        if args[i] == 'updated_at' then
+            value = math.floor(score)
+        end
+        if value == '' then
+            table.insert(unset, compact_names[args[i]])
+        else
+            table.insert(set, compact_names[args[i]])
+            table.insert(set, value)
+        end
+    end
+    if #set > 0 then
+        redis.call('HSET', job_key, unpack(set))
+    end
+    if #unset > 0 then
+        redis.call('HDEL', job_key, unpack(unset))
+    end
+end
+"""
+
+# Shared helper prepended to every script that changes a job's state.
+# Keeps {ns}:index:{state} (ZSET scored by update time), the {ns}:jobs index of
+# every job (scored by first write), the {ns}:counts hash, and the per-queue
+# copies of all three, in step with the job hash inside the same atomic script.
+# Every transition is also published on {ns}:events as
+# "job_id<TAB>old_state<TAB>new_state<TAB>queue" for live dashboards.
+# Must run after the job hash has been written.
+INDEX_STATE = QUEUE_KEYS + JOB_FIELDS + """
+local function index_state(ns, job_id, old_state, new_state, score)
+    local queue = job_get(ns .. ':job:' .. job_id, 'queue')
+    if not queue or queue == '' then
+        queue = 'default'
+    end
+    redis.call('ZADD', ns .. ':index:' .. new_state, score, job_id)
+    redis.call('ZADD', ns .. ':index:' .. new_state .. ':' .. queue, score, job_id)
+    redis.call('ZADD', ns .. ':jobs', 'NX', score, job_id)
+    redis.call('ZADD', ns .. ':jobs:' .. queue, 'NX', score, job_id)
+    if old_state == new_state then
+        return
+    end
+    if old_state then
+        redis.call('ZREM', ns .. ':index:' .. old_state, job_id)
+        redis.call('ZREM', ns .. ':index:' .. old_state .. ':' .. queue, job_id)
+        redis.call('HINCRBY', ns .. ':counts', old_state, -1)
+        redis.call('HINCRBY', ns .. ':counts:' .. queue, old_state, -1)
+    end
+    redis.call('HINCRBY', ns .. ':counts', new_state, 1)
+    redis.call('HINCRBY', ns .. ':counts:' .. queue, new_state, 1)
+    redis.call('PUBLISH', ns .. ':events', job_id .. '\t' .. (old_state or '') .. '\t' .. new_state .. '\t' .. queue)
+end
+"""
+
+# Shared helpers for rate limits and concurrency caps. A limit lives in the
+# {ns}:limit:{scope} hash (scope "queue:{name}" or "tag:{name}") with optional
+# rate (jobs/sec), burst and concurrency fields, plus the token bucket state
+# (tokens, ts). Jobs counted against a concurrency cap are kept in the
+# {ns}:limit:{scope}:active set until they finish or their worker is reaped.
+# Bucket time comes from the Redis server clock, so every host agrees on it.
+RATE_LIMITS = """
+local function limit_state(ns, scope, now)
+    local key = ns .. ':limit:' .. scope
+    local cfg = redis.call('HMGET', key, 'rate', 'burst', 'concurrency', 'tokens', 'ts')
+    local rate = tonumber(cfg[1]) or 0
+    local concurrency = tonumber(cfg[3]) or 0
+    if rate <= 0 and concurrency <= 0 then
+        return nil
+    end
+    local burst = tonumber(cfg[2]) or math.max(rate, 1)
+    local tokens = tonumber(cfg[4]) or burst
+    if rate > 0 then
+        local elapsed = math.max(now - (tonumber(cfg[5]) or now), 0)
+        tokens = math.min(burst, tokens + elapsed * rate)
+    end
+    return {key = key, rate = rate, concurrency = concurrency, tokens = tokens}
+end
+
+-- Seconds until the scope can admit one more job (0 = now), and whether its
+-- concurrency cap is full. A full cap has no known end, so it reports
+-- retry_delay.
+local function limit_wait(ns, scope, now, retry_delay)
+    local limit = limit_state(ns, scope, now)
+    if not limit then
+        return 0, false
+    end
+    local wait = 0
+    local full = false
+    if limit.rate > 0 and limit.tokens < 1 then
+        wait = (1 - limit.tokens) / limit.rate
+    end
+    if limit.concurrency > 0 and redis.call('SCARD', limit.key .. ':active') >= limit.concurrency then
+        wait = math.max(wait, retry_delay)
+        full = true
+    end
+    return wait, full
+end
+
+-- Jobs held back until their tag has a free concurrency slot
+local function held_key(ns, tag)
+    return ns .. ':limit:tag:' .. tag .. ':held'
+end
+
+local function limit_take(ns, scope, now, job_id)
+    local limit = limit_state(ns, scope, now)
+    if not limit then
+        return
+    end
+    if limit.rate > 0 then
+        redis.call('HSET', limit.key, 'tokens', tostring(limit.tokens - 1), 'ts', tostring(now))
+    end
+    if limit.concurrency > 0 then
+        redis.call('SADD', limit.key .. ':active', job_id)
+    end
+end
+
+-- Give back the concurrency slots a job holds. A freed queue slot also drops
+-- a wakeup token so workers blocked on that queue claim again straight away.
+-- Returns the job's tag if a slot of it was freed (see release_held).
+local function limit_release(ns, job_id)
+    local queue, tag = job_get(ns .. ':job:' .. job_id, 'queue', 'tag')
+    if not queue or queue == '' then
+        queue = 'default'
+    end
+    if redis.call('SREM', ns .. ':limit:queue:' .. queue .. ':active', job_id) == 1 then
+        redis.call('RPUSH', signal_key(ns, queue), '1')
+        redis.call('LTRIM', signal_key(ns, queue), 0, 1023)
+    end
+    if tag and tag ~= '' and redis.call('SREM', ns .. ':limit:tag:' .. tag .. ':active', job_id) == 1 then
+        return tag
+    end
+    return nil
+end
+"""
+
+# Shared helpers for scripts that put jobs on the pending lists. Every push
+# also drops a token on the queue's signal list, which idle workers BLPOP to
+# wake up. push_pending tallies {queue = count} in its pushed table and returns
+# the job's queue; signal_pending then feeds each queue's signal list.
+PENDING_QUEUE = """
+local function push_pending(ns, job_id, pushed)
+    local queue, priority = job_get(ns .. ':job:' .. job_id, 'queue', 'priority')
+    queue = queue or 'default'
+    redis.call('RPUSH', pending_key(ns, queue, priority), job_id)
+    pushed[queue] = (pushed[queue] or 0) + 1
+    return queue
+end
+
+local function signal_pending(ns, pushed)
+    for queue, count in pairs(pushed) do
+        local key = signal_key(ns, queue)
+        local tokens = {}
+        for i = 1, math.min(count, 1024) do
+            tokens[i] = '1'
+        end
+        redis.call('RPUSH', key, unpack(tokens))
+        redis.call('LTRIM', key, 0, 1023)
+    end
+end
+"""
+
+# Jobs whose tag is at its concurrency cap wait in the tag's held list (state
+# DELAYED) rather than cycling through the delayed set. release_held moves as
+# many as the tag has free slots (all of them once it has no cap) back to
+# their pending lists, tallying pushes like push_pending.
+# states = {delayed = .., pending = ..}; needs INDEX_STATE, RATE_LIMITS and
+# PENDING_QUEUE.
+HELD_JOBS = """
+local function release_held(ns, tag, score, updated_at, states, pushed)
+    local key = held_key(ns, tag)
+    local free = redis.call('LLEN', key)
+    local limit_key = ns .. ':limit:tag:' .. tag
+    local concurrency = tonumber(redis.call('HGET', limit_key, 'concurrency')) or 0
+    if concurrency > 0 then
+        free = math.min(free, concurrency - redis.call('SCARD', limit_key .. ':active'))
+    end
+    local moved = 0
+    while moved < free do
+        local job_id = redis.call('LPOP', key)
+        if not job_id then
+            break
+        end
+        -- Skip entries of jobs deleted, re-enqueued or delayed since
+        local job_key = ns .. ':job:' .. job_id
+        if job_get(job_key, 'state') == states.delayed
+                and not redis.call('ZSCORE', ns .. ':queue:delayed', job_id) then
+            job_set(job_key, score, 'state', states.pending, 'updated_at', updated_at)
+            index_state(ns, job_id, states.delayed, states.pending, score)
+            push_pending(ns, job_id, pushed)
+            moved = moved + 1
+        end
+    end
+end
+"""
+
+# Shared helpers for job dependencies. A job with depends_on ids waits in the
+# WAITING state with waiting_on = the number of them not completed yet, and
+# is a member of each such parent's {ns}:job:{id}:dependents set. A parent
+# that completes decrements its dependents and pushes those reaching 0; one
+# that dies fails its waiting dependents and, transitively, theirs. Each edge
+# is touched once, so a whole DAG costs O(edges) Redis work.
+# states = {waiting = .., pending = .., completed = .., dead = ..}; needs
+# INDEX_STATE and PENDING_QUEUE.
+DEPENDENCIES = """
+local function dependents_key(ns, job_id)
+    return ns .. ':job:' .. job_id .. ':dependents'
+end
+
+local function kill_waiting(ns, job_id, old_state, reason, score, updated_at, states)
+    job_set(ns .. ':job:' .. job_id, score, 'state', states.dead, 'last_error', reason,
+        'updated_at', updated_at)
+    index_state(ns, job_id, old_state, states.dead, score)
+    redis.call('RPUSH', ns .. ':queue:dead', job_id)
+end
+
+-- Link a freshly written job to its unfinished parents. Returns the state it
+-- should be in: pending, waiting, or dead if a parent is dead or missing (or
+-- is the job itself, which could never complete first).
+local function link_dependencies(ns, job_id, score, updated_at, states)
+    local job_key = ns .. ':job:' .. job_id
+    local depends_on = job_get(job_key, 'depends_on')
+    if not depends_on or depends_on == '' then
+        return job_get(job_key, 'state')
+    end
+    local waiting = 0
+    local seen = {}
+    for parent in string.gmatch(depends_on, '[^,]+') do
+        local parent_state = nil
+        if parent ~= job_id then
+            parent_state = job_get(ns .. ':job:' .. parent, 'state')
+        end
+        if not parent_state or parent_state == states.dead then
+            local reason = 'dependency ' .. parent .. (parent_state and ' failed' or ' not found')
+            if parent == job_id then
+                reason = 'job depends on itself'
+            end
+            job_set(job_key, score, 'state', states.dead, 'updated_at', updated_at, 'last_error', reason)
+            redis.call('RPUSH', ns .. ':queue:dead', job_id)
+            return states.dead
+        end
+        -- A re-enqueued job may already be in the set; count each parent once
+        if parent_state ~= states.completed and not seen[parent] then
+            seen[parent] = true
+            redis.call('SADD', dependents_key(ns, parent), job_id)
+            waiting = waiting + 1
+        end
+    end
+    if waiting == 0 then
+        job_set(job_key, score, 'state', states.pending, 'waiting_on', '0')
+        return states.pending
+    end
+    job_set(job_key, score, 'state', states.waiting, 'waiting_on', tostring(waiting))
+    return states.waiting
+end
+
+-- A parent completed: release the dependents it was the last blocker of.
+local function release_dependents(ns, job_id, score, updated_at, states, pushed)
+    local key = dependents_key(ns, job_id)
+    for _, child in ipairs(redis.call('SMEMBERS', key)) do
+        local child_key = ns .. ':job:' .. child
+        local state, waiting_on = job_get(child_key, 'state', 'waiting_on')
+        if state == states.waiting then
+            waiting_on = (tonumber(waiting_on) or 1) - 1
+            if waiting_on <= 0 then
+                job_set(child_key, score, 'state', states.pending, 'waiting_on', '0',
+                    'updated_at', updated_at)
+                index_state(ns, child, state, states.pending, score)
+                push_pending(ns, child, pushed)
+            else
+                job_set(child_key, score, 'waiting_on', tostring(waiting_on))
+            end
+        end
+    end
+    redis.call('DEL', key)
+end
+
+-- A parent is dead: fail everything waiting on it, depth first.
+-- Returns the number of jobs failed.
+local function fail_dependents(ns, job_id, score, updated_at, states)
+    local failed = 0
+    local stack = {job_id}
+    while #stack > 0 do
+        local parent = table.remove(stack)
+        local key = dependents_key(ns, parent)
+        for _, child in ipairs(redis.call('SMEMBERS', key)) do
+            local state = job_get(ns .. ':job:' .. child, 'state')
+            if state == states.waiting then
+                kill_waiting(ns, child, state, 'dependency ' .. parent .. ' failed', score, updated_at, states)
+                table.insert(stack, child)
+                failed = failed + 1
+            end
+        end
+        redis.call('DEL', key)
+    end
+    return failed
+end
+"""
+
+# Settle the dependents of a job that just completed or died (see
+# DEPENDENCIES). Runs in the same transaction as the job's own update.
+# ARGV[1] namespace, ARGV[2] job id, ARGV[3] score (epoch seconds),
+# ARGV[4] updated_at, ARGV[5] outcome (completed or dead state),
+# ARGV[6] waiting, ARGV[7] pending, ARGV[8] completed, ARGV[9] dead state
+# Returns the number of dependents released or failed.
+RESOLVE_DEPENDENTS = INDEX_STATE + PENDING_QUEUE + DEPENDENCIES + """
+local ns = ARGV[1]
+local states = {waiting = ARGV[6], pending = ARGV[7], completed = ARGV[8], dead = ARGV[9]}
+if redis.call('EXISTS', dependents_key(ns, ARGV[2])) == 0 then
+    return 0
+end
+if ARGV[5] == states.dead then
+    return fail_dependents(ns, ARGV[2], tonumber(ARGV[3]), ARGV[4], states)
+end
+local pushed = {}
+release_dependents(ns, ARGV[2], tonumber(ARGV[3]), ARGV[4], states, pushed)
+local released = 0
+for _, count in pairs(pushed) do
+    released = released + count
+end
+signal_pending(ns, pushed)
+return released
+"""
+
+# Write job fields (already in the hash's encoding) and re-index the job if
+# its state changed. With replace set the hash is rewritten from scratch.
+# KEYS[1] job hash
+# ARGV[1] namespace, ARGV[2] job id, ARGV[3] score (epoch seconds),
+# ARGV[4] replace (1/0), ARGV[5] number of fields to remove (d),
+# ARGV[6..5+d] their names, then field, value, ...
+SAVE_JOB = INDEX_STATE + """
+local old_state = job_get(KEYS[1], 'state')
+local first = 6 + tonumber(ARGV[5])
+if ARGV[4] == '1' then
+    redis.call('DEL', KEYS[1])
+elseif first > 6 then
+    redis.call('HDEL', KEYS[1], unpack(ARGV, 6, first - 1))
+end
+if first <= #ARGV then
+    redis.call('HSET', KEYS[1], unpack(ARGV, first))
+end
+local new_state = job_get(KEYS[1], 'state')
+if new_state then
+    index_state(ARGV[1], ARGV[2], old_state, new_state, tonumber(ARGV[3]))
+end
+return new_state
+"""
+
+# Claim the next pending job in a single round trip.
+# A queue is picked among the worker's queues that have work and are within
+# their limits, in proportion to their weights, then a priority list within it
+# the same way; every queue and priority with work therefore keeps a
+# guaranteed share. Throttled queues keep their jobs in place. A popped job
+# whose tag is over its limit is parked in the delayed set until the limit
+# should have room again, and the next job is tried.
+# KEYS[1] worker processing list (optional)
+# ARGV[1] namespace, ARGV[2] processing state, ARGV[3] updated_at,
+# ARGV[4] score (epoch seconds), ARGV[5] worker id,
+# ARGV[6], ARGV[7] random numbers in [0, 1) for the queue and priority picks,
+# ARGV[8] delayed state, ARGV[9] seconds to wait on a full concurrency cap,
+# ARGV[10] number of queues (n), then n queue, weight pairs,
+# then priority, weight pairs
+# Returns {job_id, pending_since, field, value, ...} (pending_since = index
+# score from when the job became pending, '' if unknown), just {job_id} if the
+# hash is missing, {'', seconds} when every queue with work is throttled, or nil.
+CLAIM_JOB = INDEX_STATE + RATE_LIMITS + """
+local ns = ARGV[1]
+local score = tonumber(ARGV[4])
+local retry_delay = tonumber(ARGV[9])
+local band_start = 11 + 2 * tonumber(ARGV[10])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+-- Most tag-throttled jobs parked by one call
+local max_deferred = 10
+
+local function pick(choices, total, r)
+    local target = r * total
+    for _, choice in ipairs(choices) do
+        if target < choice[2] then
+            return choice[1]
+        end
+    end
+    return choices[#choices][1]
+end
+
+local queues = {}
+local queue_total = 0
+local throttled_for
+for i = 11, band_start - 1, 2 do
+    local queue = ARGV[i]
+    local bands = {}
+    local band_total = 0
+    for j = band_start, #ARGV, 2 do
+        local key = pending_key(ns, queue, ARGV[j])
+        if redis.call('LLEN', key) > 0 then
+            band_total = band_total + tonumber(ARGV[j + 1])
+            table.insert(bands, {key, band_total})
+        end
+    end
+    local wait = 0
+    if band_total > 0 then
+        wait = limit_wait(ns, 'queue:' .. queue, now, retry_delay)
+    end
+    if band_total > 0 and wait == 0 then
+        queue_total = queue_total + tonumber(ARGV[i + 1])
+        table.insert(queues, {{bands, band_total, queue}, queue_total})
+    else
+        -- Leftover wakeup tokens would only cause empty claims; a throttled
+        -- queue is retried after the wait, or when a slot is released
+        redis.call('DEL', signal_key(ns, queue))
+        if wait > 0 and (not throttled_for or wait < throttled_for) then
+            throttled_for = wait
+        end
+    end
+end
+if queue_total == 0 then
+    if throttled_for then
+        return {'', tostring(throttled_for)}
+    end
+    return nil
+end
+
+local chosen = pick(queues, queue_total, tonumber(ARGV[6]))
+local source = pick(chosen[1], chosen[2], tonumber(ARGV[7]))
+local queue = chosen[3]
+
+for _ = 1, max_deferred do
+    local job_id
+    if #KEYS > 0 then
+        job_id = redis.call('LMOVE', source, KEYS[1], 'LEFT', 'RIGHT')
+    else
+        job_id = redis.call('LPOP', source)
+    end
+    if not job_id then
+        return nil
+    end
+
+    local job_key = ns .. ':job:' .. job_id
+    if redis.call('EXISTS', job_key) == 0 then
+        if #KEYS > 0 then
+            redis.call('LREM', KEYS[1], -1, job_id)
+        end
+        return {job_id}
+    end
+
+    local old_state, tag = job_get(job_key, 'state', 'tag')
+    local wait, full = 0, false
+    if tag and tag ~= '' then
+        wait, full = limit_wait(ns, 'tag:' .. tag, now, retry_delay)
+    end
+    if wait == 0 then
+        limit_take(ns, 'queue:' .. queue, now, job_id)
+        if tag and tag ~= '' then
+            limit_take(ns, 'tag:' .. tag, now, job_id)
+        end
+        local pending_since = old_state and redis.call('ZSCORE', ns .. ':index:' .. old_state, job_id)
+        job_set(job_key, score, 'state', ARGV[2], 'updated_at', ARGV[3], 'worker_id', ARGV[5])
+        index_state(ns, job_id, old_state, ARGV[2], score)
+        local result = redis.call('HGETALL', job_key)
+        table.insert(result, 1, pending_since or '')
+        table.insert(result, 1, job_id)
+        return result
+    end
+
+    if #KEYS > 0 then
+        redis.call('LREM', KEYS[1], -1, job_id)
+    end
+    job_set(job_key, score, 'state', ARGV[8], 'updated_at', ARGV[3])
+    index_state(ns, job_id, old_state, ARGV[8], score)
+    if full then
+        -- Its tag is at its concurrency cap: hold it until a slot is released
+        redis.call('RPUSH', held_key(ns, tag), job_id)
+    else
+        -- Its tag is over its rate: park it in the delayed set until a token is due
+        local run_at = score + wait
+        redis.call('ZADD', ns .. ':queue:delayed', run_at, job_id)
+        redis.call('PUBLISH', ns .. ':scheduler:wakeup', tostring(run_at))
+    end
+end
+return nil
+"""
+
+# Give back the concurrency slots held by a finished job, releasing a job
+# held for its tag into the freed slot.
+# ARGV[1] namespace, ARGV[2] job id, ARGV[3] score (epoch seconds),
+# ARGV[4] updated_at, ARGV[5] delayed state, ARGV[6] pending state
+RELEASE_LIMITS = INDEX_STATE + RATE_LIMITS + PENDING_QUEUE + HELD_JOBS + """
+local tag = limit_release(ARGV[1], ARGV[2])
+if tag then
+    local pushed = {}
+    release_held(ARGV[1], tag, tonumber(ARGV[3]), ARGV[4], {delayed = ARGV[5], pending = ARGV[6]}, pushed)
+    signal_pending(ARGV[1], pushed)
+end
+return 0
+"""
+
+# Release the jobs held for a tag whose limit was raised or cleared.
+# ARGV[1] namespace, ARGV[2] tag, ARGV[3] score (epoch seconds),
+# ARGV[4] updated_at, ARGV[5] delayed state, ARGV[6] pending state
+RELEASE_HELD = INDEX_STATE + RATE_LIMITS + PENDING_QUEUE + HELD_JOBS + """
+local pushed = {}
+release_held(ARGV[1], ARGV[2], tonumber(ARGV[3]), ARGV[4], {delayed = ARGV[5], pending = ARGV[6]}, pushed)
+signal_pending(ARGV[1], pushed)
+return 0
+"""
+
+# Write a batch of jobs and push them onto their pending lists in one call.
+# Each job's hash is replaced, so a re-enqueued job keeps nothing of its old
+# encoding. Jobs with depends_on are linked to their parents instead and only
+# pushed once those have completed, so parents must come first in the batch
+# or already exist.
+# ARGV[1] namespace, ARGV[2] score (epoch seconds), ARGV[3] updated_at,
+# ARGV[4] waiting, ARGV[5] pending, ARGV[6] completed, ARGV[7] dead state,
+# then for each job its id, number of fields (n) and n field, value pairs.
+# Returns the number of jobs enqueued.
+ENQUEUE_JOBS = INDEX_STATE + PENDING_QUEUE + DEPENDENCIES + """
+local ns = ARGV[1]
+local score = tonumber(ARGV[2])
+local states = {waiting = ARGV[4], pending = ARGV[5], completed = ARGV[6], dead = ARGV[7]}
+
+local pushed = {}
+local count = 0
+local i = 8
+while i <= #ARGV do
+    local job_id = ARGV[i]
+    local n = tonumber(ARGV[i + 1])
+    local job_key = ns .. ':job:' .. job_id
+    local old_state = job_get(job_key, 'state')
+    redis.call('DEL', job_key)
+    redis.call('HSET', job_key, unpack(ARGV, i + 2, i + 1 + 2 * n))
+    local state = link_dependencies(ns, job_id, score, ARGV[3], states)
+    index_state(ns, job_id, old_state, state, score)
+    if state == states.pending then
+        push_pending(ns, job_id, pushed)
+    end
+    redis.call('SADD', ns .. ':queues', job_get(job_key, 'queue') or 'default')
+    count = count + 1
+    i = i + 2 + 2 * n
+end
+signal_pending(ns, pushed)
+return count
+"""
+
+# Reserve a block of worker ids that no other host can be given.
+# The counter is first raised past every registered id, so workers started
+# before it existed keep theirs.
+# KEYS[1] id counter, KEYS[2] active worker set
+# ARGV[1] number of ids
+# Returns the first id of the block.
+ALLOCATE_WORKER_IDS = """
+local last = tonumber(redis.call('GET', KEYS[1]) or '0')
+for _, worker_id in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    local n = tonumber(worker_id)
+    if n and n > last then
+        last = n
+    end
+end
+redis.call('SET', KEYS[1], last + tonumber(ARGV[1]))
+return last + 1
+"""
+
+# Take or renew a lease held under a random token.
+# KEYS[1] lease key
+# ARGV[1] token, ARGV[2] ttl in milliseconds
+# Returns 1 if the caller holds the lease afterwards, 0 otherwise.
+ACQUIRE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# Drop a lease only if the caller still holds it.
+# KEYS[1] lease key, ARGV[1] token
+RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Promote up to ARGV[3] due jobs from the delayed set to their pending lists,
+# marking each one PENDING and re-indexing it.
+# KEYS[1] delayed set
+# ARGV[1] namespace, ARGV[2] now (epoch seconds), ARGV[3] batch size,
+# ARGV[4] pending state, ARGV[5] updated_at
+# Returns the number of ids taken off the delayed set.
+PROMOTE_DELAYED = INDEX_STATE + PENDING_QUEUE + """
+local ns = ARGV[1]
+local pushed = {}
+local job_ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[2], 'LIMIT', 0, tonumber(ARGV[3]))
+for _, job_id in ipairs(job_ids) do
+    redis.call('ZREM', KEYS[1], job_id)
+    local job_key = ns .. ':job:' .. job_id
+    local old_state = job_get(job_key, 'state')
+    -- Ids whose hash was deleted are simply dropped
+    if old_state then
+        job_set(job_key, tonumber(ARGV[2]), 'state', ARGV[4], 'updated_at', ARGV[5])
+        index_state(ns, job_id, old_state, ARGV[4], tonumber(ARGV[2]))
+        push_pending(ns, job_id, pushed)
+    end
+end
+signal_pending(ns, pushed)
+return #job_ids
+"""
+
+# Fire due cron schedules: enqueue each one's job for the tick it is due at
+# and move it to its next fire time. A schedule only fires while its score
+# still equals the tick the caller read, so a tick is enqueued once even if
+# two leaders overlap or the schedule was changed in between; the job id is
+# derived from the tick, so an existing job is never overwritten either.
+# KEYS[1] schedule set ({ns}:cron, name scored by next fire time)
+# ARGV[1] namespace, ARGV[2] score (epoch seconds), then for each schedule its
+# name, due tick, next tick, job id, number of fields (n) and n field, value
+# pairs.
+# Returns the ids of the jobs enqueued.
+FIRE_CRON = INDEX_STATE + PENDING_QUEUE + """
+local ns = ARGV[1]
+local score = tonumber(ARGV[2])
+
+local pushed = {}
+local enqueued = {}
+local i = 3
+while i <= #ARGV do
+    local name, due, next_at, job_id = ARGV[i], ARGV[i + 1], ARGV[i + 2], ARGV[i + 3]
+    local n = tonumber(ARGV[i + 4])
+    local current = redis.call('ZSCORE', KEYS[1], name)
+    if current and tonumber(current) == tonumber(due) then
+        local job_key = ns .. ':job:' .. job_id
+        if redis.call('EXISTS', job_key) == 0 then
+            redis.call('HSET', job_key, unpack(ARGV, i + 5, i + 4 + 2 * n))
+            index_state(ns, job_id, nil, job_get(job_key, 'state'), score)
+            redis.call('SADD', ns .. ':queues', push_pending(ns, job_id, pushed))
+            table.insert(enqueued, job_id)
+        end
+        redis.call('ZADD', KEYS[1], next_at, name)
+        redis.call('HSET', KEYS[1] .. ':' .. name, 'last_at', due, 'last_job_id', job_id)
+    end
+    i = i + 5 + 2 * n
+end
+signal_pending(ns, pushed)
+return enqueued
+"""
+
+# Recover everything a dead worker held and drop it from the registry.
+# Jobs it was running count one attempt, give back their concurrency slots and
+# go back to pending (or DEAD once out of retries); ids it had moved but not
+# yet claimed are simply requeued.
+# ARGV[1] namespace, ARGV[2] worker id, ARGV[3] heartbeat cutoff ('' = force),
+# ARGV[4] score (epoch seconds), ARGV[5] updated_at, ARGV[6] processing state,
+# ARGV[7] pending state, ARGV[8] dead state, ARGV[9] waiting state,
+# ARGV[10] delayed state
+# Returns the number of jobs recovered, or -1 if the worker has heartbeated
+# since the cutoff.
+REAP_WORKER = INDEX_STATE + RATE_LIMITS + PENDING_QUEUE + HELD_JOBS + DEPENDENCIES + """
+local ns = ARGV[1]
+local worker_id = ARGV[2]
+local heartbeat_key = ns .. ':workers:heartbeat'
+if ARGV[3] ~= '' then
+    local beat = redis.call('ZSCORE', heartbeat_key, worker_id)
+    if beat and tonumber(beat) > tonumber(ARGV[3]) then
+        return -1
+    end
+end
+
+local score = tonumber(ARGV[4])
+local requeued = {}
+local processing_key = ns .. ':worker:' .. worker_id .. ':processing'
+local job_ids = redis.call('LRANGE', processing_key, 0, -1)
+for _, job_id in ipairs(job_ids) do
+    local job_key = ns .. ':job:' .. job_id
+    local old_state, attempts, max_retries = job_get(job_key, 'state', 'attempts', 'max_retries')
+    if old_state then
+        local tag = limit_release(ns, job_id)
+        if tag then
+            release_held(ns, tag, score, ARGV[5], {delayed = ARGV[10], pending = ARGV[7]}, requeued)
+        end
+        attempts = tonumber(attempts or '0')
+        local state = ARGV[7]
+        if old_state == ARGV[6] then
+            attempts = attempts + 1
+            if attempts >= tonumber(max_retries or '0') then
+                state = ARGV[8]
+            end
+        end
+        job_set(job_key, score, 'state', state, 'attempts', tostring(attempts),
+            'updated_at', ARGV[5], 'worker_id', '')
+        index_state(ns, job_id, old_state, state, score)
+        if state == ARGV[8] then
+            redis.call('RPUSH', ns .. ':queue:dead', job_id)
+            fail_dependents(ns, job_id, score, ARGV[5], {waiting = ARGV[9], dead = ARGV[8]})
+        else
+            push_pending(ns, job_id, requeued)
+        end
+    end
+end
+signal_pending(ns, requeued)
+
+redis.call('DEL', processing_key, ns .. ':worker:' .. worker_id, ns .. ':worker:' .. worker_id .. ':stop')
+redis.call('SREM', ns .. ':workers:active', worker_id)
+redis.call('ZREM', heartbeat_key, worker_id)
+return #job_ids
+"""
+
+# Delete finished jobs: the hash, its log stream, its index entries and its
+# share of the counters. A job is only deleted if it is still in the expected
+# state; otherwise its entry in that state's index is stale and is dropped.
+# ARGV[1] namespace, ARGV[2] expected state, ARGV[3] dead state,
+# ARGV[4..] job ids
+# Returns the number of jobs deleted.
+DELETE_JOBS = JOB_FIELDS + """
+local ns = ARGV[1]
+local state = ARGV[2]
+local deleted = 0
+for i = 4, #ARGV do
+    local job_id = ARGV[i]
+    local job_key = ns .. ':job:' .. job_id
+    local job_state, queue = job_get(job_key, 'state', 'queue')
+    if job_state == state then
+        if not queue or queue == '' then
+            queue = 'default'
+        end
+        redis.call('DEL', job_key, job_key .. ':log')
+        redis.call('ZREM', ns .. ':index:' .. state .. ':' .. queue, job_id)
+        redis.call('ZREM', ns .. ':jobs', job_id)
+        redis.call('ZREM', ns .. ':jobs:' .. queue, job_id)
+        redis.call('HINCRBY', ns .. ':counts', state, -1)
+        redis.call('HINCRBY', ns .. ':counts:' .. queue, state, -1)
+        if state == ARGV[3] then
+            -- Oldest dead jobs sit near the head, so this scan stays short
+            redis.call('LREM', ns .. ':queue:dead', 1, job_id)
+        end
+        deleted = deleted + 1
+    end
+    redis.call('ZREM', ns .. ':index:' .. state, job_id)
+end
+return deleted
+"""
+
+# Scripts Storage queues on pipelines as bare EVALSHA. RedisConnection loads
+# them on every new connection, so a restarted Redis has them before any
+# transaction that uses them reaches it.
+PIPELINED_SCRIPTS = (SAVE_JOB, ENQUEUE_JOBS, RELEASE_LIMITS, RESOLVE_DEPENDENTS)
@@ -1,13 +1,11 @@
 # main.py
 from queuectl.cli import build_cli
 from queuectl.storage import Storage
-from queuectl.config import Config
 
 
 def main():
     storage = Storage()
-    cfg = Config.load()
-    cli = build_cli(storage=storage, config=cfg)
+    cli = build_cli(storage=storage, config=storage.config)
     cli()
 
 
@@ -0,0 +1,110 @@
+# metrics.py
+# Counters and histograms shared by every process through one Redis hash.
+# Each process aggregates increments in memory and flushes them inside a
+# pipeline it is already sending (job completion, heartbeat), so recording
+# never costs a round trip of its own.
+import threading
+
+PREFIX = "queuectl_"
+
+# Upper bounds in seconds of each histogram's buckets ("+Inf" is implied)
+BUCKETS = {
+    "job_wait_seconds": (0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+    "job_duration_seconds": (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+    "fetch_seconds": (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+}
+
+# name -> (type, help), in the order they are rendered
+METRICS = {
+    "jobs_enqueued_total": ("counter", "Jobs enqueued."),
+    "jobs_completed_total": ("counter", "Jobs that finished successfully."),
+    "jobs_failed_total": ("counter", "Job attempts that failed, timed out or could not start."),
+    "jobs_retried_total": ("counter", "Failed attempts scheduled for a retry."),
+    "jobs_dead_total": ("counter", "Jobs moved to the dead letter queue."),
+    "job_wait_seconds": ("histogram", "Time from a job becoming pending to a worker claiming it."),
+    "job_duration_seconds": ("histogram", "Run time of a job's command."),
+    "fetch_seconds": ("histogram", "Round-trip time of the claim script."),
+}
+
+
+class Metrics:
+    """
+    In-process buffer of metric increments for the {ns}:metrics hash.
+    Hash fields are "name|queue" for counters and histogram sums, and
+    "name|queue|le" for (non-cumulative) histogram buckets, whose total is the
+    histogram's count. Thread-safe.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, queue="", amount=1):
+        with self._lock:
+            self._add(f"{name}|{queue}", amount)
+
+    def observe(self, name, value, queue=""):
+        le = next((str(bound) for bound in BUCKETS[name] if value <= bound), "+Inf")
+        with self._lock:
+            self._add(f"{name}|{queue}|{le}", 1)
+            self._add(f"{name}_sum|{queue}", float(value))
+
+    def _add(self, field, amount):
+        self._pending[field] = self._pending.get(field, 0) + amount
+
+    def flush(self, pipe):
+        """Queue the buffered increments on pipe and reset the buffer."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for field, amount in pending.items():
+            if isinstance(amount, float):
+                pipe.hincrbyfloat(self.key, field, amount)
+            else:
+                pipe.hincrby(self.key, field, amount)
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _labels(queue, le=None):
+    labels = []
+    if queue:
+        labels.append(f'queue="{queue}"')
+    if le is not None:
+        labels.append(f'le="{le}"')
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def render(values):
+    """Prometheus text exposition of the {ns}:metrics hash."""
+    counters = {}
+    buckets = {}
+    for field, value in values.items():
+        parts = field.split("|")
+        if len(parts) == 3:
+            buckets.setdefault((parts[0], parts[1]), {})[parts[2]] = int(value)
+        elif len(parts) == 2:
+            counters[(parts[0], parts[1])] = float(value)
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        if kind == "counter":
+            for (metric, queue), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{PREFIX}{name}{_labels(queue)} {_number(value)}")
+            continue
+        for (metric, queue), counts in sorted(buckets.items()):
+            if metric != name:
+                continue
+            total = 0
+            for le in [str(bound) for bound in BUCKETS[name]] + ["+Inf"]:
+                total += counts.get(le, 0)
+                lines.append(f"{PREFIX}{name}_bucket{_labels(queue, le)} {total}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(queue)} {_number(counters.get((name + '_sum', queue), 0))}")
+            lines.append(f"{PREFIX}{name}_count{_labels(queue)} {total}")
+    return "\n".join(lines) + "\n"
@@ -1,22 +1,77 @@
 # models.py
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+import time
 import uuid
 
 import queuectl.jobState as jobState
 
-def _get_default_max_retries():
-    """Get max_retries from config, with fallback to default."""
+# Queue used when a job does not name one
+DEFAULT_QUEUE = "default"
+
+# Job hash encodings. "full" stores every field under its own name with ISO-8601
+# timestamps. "compact" uses one-letter names, whole epoch seconds for
+# timestamps, leaves out the id (it is in the key) and any field still at its
+# default. Readers accept both; luaScripts.JOB_FIELDS mirrors these names.
+COMPACT_FIELDS = {
+    "id": "i", "command": "c", "state": "s", "attempts": "a", "max_retries": "r",
+    "created_at": "C", "updated_at": "u", "worker_id": "w", "timeout_seconds": "t",
+    "cpu_limit": "p", "memory_limit": "m", "last_error": "e", "priority": "P",
+    "queue": "q", "tag": "g", "timings": "T", "kind": "k", "args": "A", "result": "R",
+    "depends_on": "D", "waiting_on": "W",
+}
+FULL_FIELDS = {short: name for name, short in COMPACT_FIELDS.items()}
+COMPACT_DEFAULTS = {
+    "attempts": "0", "worker_id": "", "timeout_seconds": "0.0", "cpu_limit": "0",
+    "memory_limit": "0", "last_error": "", "priority": jobState.JobPriority.NORMAL.value,
+    "queue": DEFAULT_QUEUE, "tag": "", "timings": "", "kind": jobState.JobKind.SHELL.value,
+    "args": "", "result": "", "depends_on": "", "waiting_on": "0",
+}
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+def _epoch(value):
+    """ISO-8601 timestamp to whole epoch seconds (as a string)."""
     try:
-        from queuectl.config import Config
-        config = Config.load()
-        max_retries = config.get("max_retries")
-        # Convert to int if it's a string (from JSON)
-        if isinstance(max_retries, str):
-            return int(max_retries)
-        return int(max_retries) if max_retries is not None else 3
-    except Exception:
-        return 3
+        return str(int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()))
+    except (AttributeError, ValueError):
+        return str(int(time.time()))
+
+
+def encode_job(values, compact=False):
+    """Hash fields for a {field: value} dict of a job, as Redis stores them."""
+    if not compact:
+        return {name: str(value) for name, value in values.items()}
+    encoded = {}
+    for name, value in values.items():
+        value = str(value)
+        if name == "id" or COMPACT_DEFAULTS.get(name) == value:
+            continue
+        if name in TIMESTAMP_FIELDS:
+            value = _epoch(value)
+        encoded[COMPACT_FIELDS[name]] = value
+    return encoded
+
+
+def decode_job(data, job_id=None):
+    """A job hash in either encoding as {field: value} with full names and ISO-8601 timestamps."""
+    if not data or "s" not in data:
+        return data
+    values = {}
+    for name, short in COMPACT_FIELDS.items():
+        if short in data:
+            value = data[short]
+            if name in TIMESTAMP_FIELDS:
+                value = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(value)))
+        elif name == "id" and job_id is not None:
+            value = job_id
+        elif name in COMPACT_DEFAULTS:
+            value = COMPACT_DEFAULTS[name]
+        else:
+            continue
+        values[name] = value
+    return values
+
 
 @dataclass
 class Job:
@@ -24,12 +79,58 @@ class Job:
     command: str
     state: str = jobState.JobState.PENDING.value
     attempts: int = 0
-    max_retries: int = field(default_factory=_get_default_max_retries)
+    # None until enqueued, when Storage applies the max_retries config
+    max_retries: int | None = None
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    worker_id: str = ""
+    # Limits enforced by the worker; 0 means no limit. A None timeout is left
+    # to the job_timeout config, applied by Storage like max_retries
+    timeout_seconds: float | None = None
+    cpu_limit: int = 0        # CPU seconds
+    memory_limit: int = 0     # MiB of address space
+    last_error: str = ""
+    priority: str = jobState.JobPriority.NORMAL.value
+    queue: str = DEFAULT_QUEUE
+    # Optional job type, for limits shared across queues
+    tag: str = ""
+    # Seconds per worker phase of the last attempt, "fetch=0.0012,spawn=0.0040,run=1.2031"
+    timings: str = ""
+    kind: str = jobState.JobKind.SHELL.value
+    # JSON arguments of a python job (list = positional, object = keywords)
+    args: str = ""
+    # JSON return value of a python job that completed
+    result: str = ""
+    # Comma-separated ids of jobs that must complete before this one runs
+    depends_on: str = ""
+    # How many of them have not completed yet (kept by the Lua scripts)
+    waiting_on: int = 0
+
+    def __post_init__(self):
+        # Redis hashes hand every field back as a string
+        self.attempts = int(self.attempts)
+        if self.max_retries is not None:
+            self.max_retries = int(self.max_retries)
+        if self.timeout_seconds is not None:
+            self.timeout_seconds = float(self.timeout_seconds)
+        self.cpu_limit = int(self.cpu_limit)
+        self.memory_limit = int(self.memory_limit)
+        self.waiting_on = int(self.waiting_on)
+
+    def to_dict(self):
+        """Field values by name."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     @classmethod
-    def new(cls, command: str, max_retries: int = None, job_id: str | None = None):
-        if max_retries is None:
-            max_retries = _get_default_max_retries()
-        return cls(id=job_id or str(uuid.uuid4()), command=command, max_retries=max_retries)
\ No newline at end of file
+    def new(cls, command: str, max_retries: int = None, job_id: str | None = None,
+            timeout_seconds: float = None, cpu_limit: int = 0, memory_limit: int = 0,
+            priority: str = jobState.JobPriority.NORMAL.value, queue: str = DEFAULT_QUEUE,
+            tag: str = "", kind: str = jobState.JobKind.SHELL.value, args: str = "",
+            depends_on=()):
+        if not isinstance(depends_on, str):
+            depends_on = ",".join(depends_on)
+        if job_id is not None and job_id in depends_on.split(","):
+            raise ValueError(f"Job {job_id} depends on itself")
+        return cls(id=job_id or str(uuid.uuid4()), command=command, max_retries=max_retries,
+                   timeout_seconds=timeout_seconds, cpu_limit=cpu_limit, memory_limit=memory_limit,
+                   priority=priority, queue=queue, tag=tag, kind=kind, args=args, depends_on=depends_on)
\ No newline at end of file
@@ -0,0 +1,73 @@
+# profiler.py
+# Opt-in sampling profiler for worker processes. Profiling is switched on for
+# a short window once per interval and off in between, so its cost averages
+# out to window / interval of the overhead of cProfile or tracemalloc, which
+# is small enough to leave on in production.
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+MODES = ("cpu", "memory")
+
+
+def default_profile_dir():
+    return Path(__file__).parent / "data" / "profiles"
+
+
+class Profiler:
+    """
+    Writes a report every interval seconds, covering the last window seconds:
+    "cpu" is a cProfile of the event loop thread sorted by cumulative time,
+    "memory" the tracemalloc lines holding the most memory allocated during
+    the window. Redis calls run in helper threads, so they only show up as
+    the awaits that wait for them; WorkerStats covers their timing.
+    """
+
+    TOP = 40
+
+    def __init__(self, mode, name, directory=None, interval=300, window=10):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r} (use {', '.join(MODES)})")
+        self.mode = mode
+        self.name = name
+        self.directory = Path(directory) if directory else default_profile_dir()
+        self.window = min(window, interval)
+        self.interval = interval
+
+    async def run(self):
+        """Profile forever, one window per interval; cancel to stop."""
+        while True:
+            await asyncio.sleep(self.interval - self.window)
+            path = await self.sample()
+            print(f"[Profiler] Wrote {path}")
+
+    async def sample(self):
+        """Profile the next window seconds and write the report. Returns its path."""
+        if self.mode == "cpu":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                profile.disable()
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.TOP)
+            report = out.getvalue()
+        else:
+            tracemalloc.start()
+            try:
+                await asyncio.sleep(self.window)
+                snapshot = tracemalloc.take_snapshot()
+            finally:
+                tracemalloc.stop()
+            report = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:self.TOP])
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        path = self.directory / f"{self.name}-{self.mode}-{stamp}.txt"
+        path.write_text(f"# {self.mode} profile of {self.name}, {self.window:g}s window ending {stamp}\n{report}\n")
+        return path
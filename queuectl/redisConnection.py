@@ -1,11 +1,46 @@
 # redis_connection.py
 import redis
+import redis.asyncio
+import queuectl.luaScripts as luaScripts
 
 class RedisConnection:
     _client = None
+    _async_client = None
 
     @classmethod
     def get_client(cls, url="redis://localhost:6379/0"):
         if cls._client is None:
-            cls._client = redis.Redis.from_url(url, decode_responses=True)
+            cls._client = redis.Redis.from_url(url, decode_responses=True,
+                                               redis_connect_func=cls._on_connect)
         return cls._client
+
+    @staticmethod
+    def _on_connect(connection):
+        """
+        Set up a new connection, then load the pipelined Lua scripts on it in
+        one round trip. A Redis restart empties the script cache but also drops
+        every connection, so EVALSHA inside a MULTI cannot find them missing.
+        """
+        connection.on_connect()
+        for script in luaScripts.PIPELINED_SCRIPTS:
+            connection.send_command("SCRIPT", "LOAD", script)
+        for _ in luaScripts.PIPELINED_SCRIPTS:
+            connection.read_response()
+
+    @classmethod
+    def get_async_client(cls, url="redis://localhost:6379/0", max_connections=50):
+        """
+        Shared asyncio client backed by one connection pool. Create it from
+        inside the event loop that will use it (e.g. at server startup).
+        """
+        if cls._async_client is None:
+            cls._async_client = redis.asyncio.Redis.from_url(
+                url, decode_responses=True, max_connections=max_connections
+            )
+        return cls._async_client
+
+    @classmethod
+    async def close_async_client(cls):
+        if cls._async_client is not None:
+            await cls._async_client.aclose()
+            cls._async_client = None
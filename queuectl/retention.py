@@ -0,0 +1,73 @@
+# retention.py
+import queuectl.jobState as jobState
+from queuectl.archive import Archive
+from queuectl.config import parse_weights
+
+
+class Retention:
+    """
+    Deletes finished job records that are past their retention limits,
+    archiving them first when an Archive is given. Limits are per state:
+    max_age in seconds since the job entered the state, max_count as the
+    number of most recent jobs kept. Selection walks the state indexes oldest
+    first, so only expired records are ever read.
+    """
+
+    # Only terminal states can be compacted; anything else may still run
+    STATES = (jobState.JobState.COMPLETED.value, jobState.JobState.DEAD.value)
+
+    def __init__(self, storage, max_age=None, max_count=None, archive: Archive = None, batch_size=500):
+        self.storage = storage
+        self.max_age = {k.upper(): v for k, v in (max_age or {}).items()}
+        self.max_count = {k.upper(): v for k, v in (max_count or {}).items()}
+        for state in set(self.max_age) | set(self.max_count):
+            if state not in self.STATES:
+                raise ValueError(f"Retention only applies to {', '.join(self.STATES)}, not {state}")
+        self.archive = archive
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_config(cls, storage, config):
+        """
+        Retention from config keys retention_max_age / retention_max_count
+        ("completed:86400,dead:604800"), or None if neither is set.
+        """
+        max_age = parse_weights(config.get("retention_max_age") or "")
+        max_count = parse_weights(config.get("retention_max_count") or "")
+        if not max_age and not max_count:
+            return None
+        archive = None
+        if str(config.get("retention_archive")).lower() not in ("false", "0", "no"):
+            archive = Archive(config.get("archive_dir") or None)
+        return cls(storage, max_age=max_age, max_count=max_count, archive=archive)
+
+    def run_batch(self):
+        """
+        Remove at most one batch of each limited state. Returns ({state:
+        records removed}, whether any state may have more to remove).
+        """
+        removed, more = {}, False
+        for state in self.STATES:
+            if state not in self.max_age and state not in self.max_count:
+                continue
+            job_ids = self.storage.expiredJobIds(state, max_age=self.max_age.get(state),
+                                                 max_count=self.max_count.get(state),
+                                                 limit=self.batch_size)
+            removed[state] = 0
+            if not job_ids:
+                continue
+            if self.archive is not None:
+                # Archive first: a crash in between leaves a duplicate, never a lost record
+                self.archive.write(self.storage.getJobs(job_ids))
+            removed[state] = self.storage.deleteJobs(job_ids, state)
+            more = more or len(job_ids) >= self.batch_size
+        return removed, more
+
+    def run(self):
+        """Enforce every limit once. Returns {state: records removed}."""
+        removed, more = self.run_batch()
+        while more:
+            batch, more = self.run_batch()
+            for state, count in batch.items():
+                removed[state] += count
+        return removed
@@ -1,25 +1,140 @@
 # schedulerQueue.py
+import os
+import socket
 import time
 import threading
+import uuid
 from queuectl.storage import Storage
 
 class SchedulerQueue:
-    def __init__(self, storage: Storage, poll_interval=2):
+    """
+    Moves delayed jobs back to pending when they are due and enqueues the
+    jobs of cron schedules at their fire times.
+
+    Only the replica holding the Redis leader lease does any work. It also
+    reaps workers whose heartbeat has expired and, given a Retention, compacts
+    finished jobs every compact_interval seconds. The leader
+    sleeps until the earliest score in the delayed set and is woken early by a
+    pub/sub message whenever a job is delayed or a schedule added, so retries
+    and cron jobs fire on time without a fixed poll interval.
+    """
+
+    def __init__(self, storage: Storage, poll_interval=2, lease_ttl=10, batch_size=1000,
+                 heartbeat_timeout=30, retention=None, compact_interval=60):
         self.storage = storage
-        self.poll_interval = poll_interval
+        # Retention policy enforced by the leader; None keeps every record
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self._last_compact = 0
+        # True while a compaction pass still has batches left
+        self._compacting = False
+        # Workers silent for longer than this are reaped by the leader
+        self.heartbeat_timeout = heartbeat_timeout
+        self._last_reap = 0
+        # Most delayed jobs promoted (and cron schedules fired) per script call
+        self.batch_size = batch_size
+        # Longest a leader sleeps without re-checking; also the lease renew period
+        self.poll_interval = min(poll_interval, lease_ttl / 3)
+        self.lease_ttl = lease_ttl
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4()}"
         self._running = False
+        self._stopped = threading.Event()
 
     def start(self):
         if self._running:
             return
-        self._running = True
-        t = threading.Thread(target=self._run, daemon=True)
+        t = threading.Thread(target=self.run, daemon=True)
         t.start()
 
-    def _run(self):
-        while self._running:
-            self.storage.moveReadyDelayedJob()
-            time.sleep(self.poll_interval)
+    def run(self):
+        """Run the scheduler loop in the current thread until stop() is called."""
+        self._running = True
+        self._stopped.clear()
+        pubsub = None
+        try:
+            while self._running:
+                if not self.storage.acquireSchedulerLease(self.token, self.lease_ttl):
+                    if pubsub is not None:
+                        print("[Scheduler] Lost leader lease")
+                        pubsub.close()
+                        pubsub = None
+                    self._stopped.wait(self.poll_interval)
+                    continue
+
+                if pubsub is None:
+                    print(f"[Scheduler] Acquired leader lease ({self.token})")
+                    # Subscribe before the first pass so no wakeup is missed
+                    pubsub = self.storage.subscribeScheduler()
+
+                self._reap()
+                compacting = self._compact()
+                moved = self.storage.moveReadyDelayedJob(self.batch_size)
+                fired = self._fire()
+                if moved >= self.batch_size or fired >= self.batch_size or compacting:
+                    continue  # more are due; renew the lease and take the next slice
+                self._wait(pubsub)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+            self.storage.releaseSchedulerLease(self.token)
+            self._running = False
+
+    def _reap(self):
+        """Recover jobs held by dead workers, at most every few seconds."""
+        if time.time() - self._last_reap < self.heartbeat_timeout / 3:
+            return
+        self._last_reap = time.time()
+        try:
+            for worker_id, recovered in self.storage.reapDeadWorkers(self.heartbeat_timeout).items():
+                print(f"[Scheduler] Reaped dead worker {worker_id}, recovered {recovered} job(s)")
+        except Exception as e:
+            print(f"[Scheduler] Error reaping dead workers: {e}")
+
+    def _compact(self):
+        """
+        Apply the retention policy every compact_interval seconds, one batch
+        per call so the lease is renewed between batches. Returns True while
+        the pass has more to remove.
+        """
+        if self.retention is None:
+            return False
+        if not self._compacting:
+            if time.time() - self._last_compact < self.compact_interval:
+                return False
+            self._last_compact = time.time()
+        try:
+            removed, self._compacting = self.retention.run_batch()
+            for state, count in removed.items():
+                if count:
+                    print(f"[Scheduler] Compacted {count} {state} job(s)")
+        except Exception as e:
+            print(f"[Scheduler] Error compacting jobs: {e}")
+            self._compacting = False
+        return self._compacting
+
+    def _fire(self):
+        """Enqueue the jobs of due cron schedules. Returns the number of schedules due."""
+        try:
+            return self.storage.fireDueCrons(self.batch_size)
+        except Exception as e:
+            print(f"[Scheduler] Error firing cron schedules: {e}")
+            return 0
+
+    def _wait(self, pubsub):
+        """Sleep until the next delayed job or cron tick is due, a wakeup arrives or the lease needs renewing."""
+        timeout = self.poll_interval
+        for next_at in (self.storage.nextDelayedAt(), self.storage.nextCronAt()):
+            if next_at is not None:
+                timeout = min(timeout, max(next_at - time.time(), 0))
+        if timeout <= 0:
+            return
+        message = pubsub.get_message(timeout=timeout)
+        # Coalesce a burst of wakeups into a single pass
+        while message:
+            if message["channel"] == self.storage.config.channel and self.storage.config.refresh(message["data"]):
+                print(f"[Scheduler] Reloaded config (version {message['data']})")
+            message = pubsub.get_message(timeout=0)
 
     def stop(self):
         self._running = False
+        self._stopped.set()
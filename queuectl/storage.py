@@ -1,27 +1,222 @@
-
-
-from aiohttp import Payload
-from dotenv import get_key
 import queuectl.jobState as jobState
-from queuectl.models import Job
+import queuectl.luaScripts as luaScripts
+import queuectl.metrics as metrics
+from queuectl.config import RedisConfig
+from queuectl.cron import CronExpression
+from queuectl.models import Job, DEFAULT_QUEUE, COMPACT_FIELDS, decode_job, encode_job
 from queuectl.redisConnection import RedisConnection
+from redis.exceptions import NoScriptError
+import random
 import time
-class Storage:
+from datetime import datetime
+
+def _parse_timestamp(value):
+    """ISO-8601 timestamp from a job hash to epoch seconds (now if unparseable)."""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+
+# Share of claims each priority gets while all of them have work
+DEFAULT_PRIORITY_WEIGHTS = {
+    jobState.JobPriority.HIGH.value: 6,
+    jobState.JobPriority.NORMAL.value: 3,
+    jobState.JobPriority.LOW.value: 1,
+}
+
+
+# Longest a worker waits before retrying a queue at its concurrency cap. A
+# released queue slot also wakes blocked workers, and jobs held for a full tag
+# are released by its slots, so this is only a fallback.
+LIMIT_RETRY_DELAY = 1.0
+
+# Job fields a cron schedule stores and copies into every job it enqueues
+CRON_JOB_FIELDS = ("command", "kind", "args", "max_retries", "timeout_seconds", "cpu_limit",
+                   "memory_limit", "priority", "queue", "tag")
+
+
+class StorageKeys:
+    """Redis key names under a namespace, shared by Storage and AsyncStorage."""
+
     def __init__(self, namespace="queuectl"):
-        redisClient = RedisConnection()
         self.ns = namespace
-        self._client = redisClient.get_client()
-        pass
-
-    def saveState(self, job:Job):
-        self._client.hset(self.getKey(job.id), mapping=job.__dict__)
 
     def getKey(self, job_id):
         return f"{self.ns}:job:{job_id}"
-    
+
+    def getProcessingKey(self, worker_id):
+        return f"{self.ns}:worker:{worker_id}:processing"
+
+    def getLogKey(self, job_id):
+        return f"{self.ns}:job:{job_id}:log"
+
+    def getIndexKey(self, state=None, queue=None):
+        """
+        Sorted set of job ids in a state (scored by update time), or of all jobs,
+        optionally restricted to one queue.
+        """
+        suffix = "" if queue is None else f":{queue}"
+        if state is None:
+            return f"{self.ns}:jobs{suffix}"
+        return f"{self.ns}:index:{state.upper()}{suffix}"
+
+    def getQueuePrefix(self, queue=DEFAULT_QUEUE):
+        """Key prefix of a queue's pending and signal lists (mirrors queue_prefix in luaScripts)."""
+        if not queue or queue == DEFAULT_QUEUE:
+            return f"{self.ns}:queue:"
+        return f"{self.ns}:queue:{queue}:"
+
+    def getSchedulerChannel(self):
+        return f"{self.ns}:scheduler:wakeup"
+
+    def getEventsChannel(self):
+        return f"{self.ns}:events"
+
+    def getLimitKey(self, scope):
+        """Hash holding the limit for a scope ("queue:{name}" or "tag:{name}")."""
+        return f"{self.ns}:limit:{scope}"
+
+    def getDependentsKey(self, job_id):
+        """Set of ids of WAITING jobs that depend on a job (mirrors dependents_key in luaScripts)."""
+        return f"{self.ns}:job:{job_id}:dependents"
+
+    def getCronKey(self, name=None):
+        """Sorted set of cron schedule names by next fire time, or one schedule's hash."""
+        if name is None:
+            return f"{self.ns}:cron"
+        return f"{self.ns}:cron:{name}"
+
+
+class Storage(StorageKeys):
+    def __init__(self, namespace="queuectl", compact=None):
+        super().__init__(namespace)
+        # Encoding of the job hashes this instance creates (see models.encode_job),
+        # None to follow the job_encoding config; existing hashes keep theirs
+        self._compact = compact
+        redisClient = RedisConnection()
+        self._client = redisClient.get_client()
+        self._config = None
+        # Buffered metric increments, flushed with pipelines sent anyway
+        self.metrics = metrics.Metrics(f"{self.ns}:metrics")
+        self._claim_script = self._client.register_script(luaScripts.CLAIM_JOB)
+        self._save_script = self._client.register_script(luaScripts.SAVE_JOB)
+        self._enqueue_script = self._client.register_script(luaScripts.ENQUEUE_JOBS)
+        self._promote_script = self._client.register_script(luaScripts.PROMOTE_DELAYED)
+        self._reap_script = self._client.register_script(luaScripts.REAP_WORKER)
+        self._release_limits_script = self._client.register_script(luaScripts.RELEASE_LIMITS)
+        self._release_held_script = self._client.register_script(luaScripts.RELEASE_HELD)
+        self._acquire_lease_script = self._client.register_script(luaScripts.ACQUIRE_LEASE)
+        self._release_lease_script = self._client.register_script(luaScripts.RELEASE_LEASE)
+        self._delete_script = self._client.register_script(luaScripts.DELETE_JOBS)
+        self._fire_cron_script = self._client.register_script(luaScripts.FIRE_CRON)
+        self._resolve_script = self._client.register_script(luaScripts.RESOLVE_DEPENDENTS)
+        self._allocate_ids_script = self._client.register_script(luaScripts.ALLOCATE_WORKER_IDS)
+        # Scripts queued on pipelines go out as bare EVALSHA (see _script)
+        self._pipelined_scripts = (self._save_script, self._enqueue_script,
+                                   self._release_limits_script, self._resolve_script)
+        self._scripts_loaded = False
+
+    def _loadScripts(self):
+        """SCRIPT LOAD the pipelined scripts, all in one round trip."""
+        pipe = self._client.pipeline(transaction=False)
+        for script in self._pipelined_scripts:
+            pipe.script_load(script.script)
+        pipe.execute()
+        self._scripts_loaded = True
+
+    def _script(self, script, keys=(), args=(), client=None):
+        """
+        Run a script, or queue it on a pipeline as a bare EVALSHA. Queuing the
+        Script object itself would make every execute() send SCRIPT EXISTS
+        first; instead the scripts are loaded once and _execute covers Redis
+        having since lost them.
+        """
+        if client is None or client is self._client:
+            return script(keys=keys, args=args, client=self._client)
+        if not self._scripts_loaded:
+            self._loadScripts()
+        client.evalsha(script.sha, len(keys), *keys, *args)
+
+    def _execute(self, pipe):
+        """
+        Execute a pipeline holding _script calls. If Redis lost its script
+        cache since the scripts were loaded (SCRIPT FLUSH; a restart reloads
+        them on reconnect, see RedisConnection), load them again and resend:
+        a whole MULTI/EXEC transaction, whose other commands ran without the
+        scripts, or just the failed calls of a plain pipeline.
+        """
+        stack = list(pipe.command_stack)
+        results = pipe.execute(raise_on_error=False)
+        failed = [i for i, result in enumerate(results) if isinstance(result, NoScriptError)]
+        if failed:
+            self._loadScripts()
+            retry = self._client.pipeline(transaction=pipe.transaction)
+            if pipe.transaction:
+                failed = range(len(stack))
+            for i in failed:
+                args, options = stack[i]
+                retry.execute_command(*args, **options)
+            for i, result in zip(failed, retry.execute(raise_on_error=False)):
+                results[i] = result
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    @property
+    def config(self):
+        """Shared config from Redis, loaded on first use and cached (see RedisConfig)."""
+        if self._config is None:
+            self._config = RedisConfig(self._client, self.ns).reload()
+        return self._config
+
+    @property
+    def compact(self):
+        if self._compact is not None:
+            return self._compact
+        return self.config.get("job_encoding") == "compact"
+
+    def saveState(self, job:Job, client=None):
+        """
+        Write the fields of the job hash that changed since it was read or last
+        saved; the script re-indexes it if its state changed. A job Storage has
+        not seen before replaces its hash.
+        """
+        client = client or self._client
+        saved = getattr(job, "_saved", None)
+        if saved is None:
+            self._applyDefaults(job)
+        compact = self.compact if saved is None else "s" in saved
+        encoded = encode_job(job.to_dict(), compact)
+        removed = [] if saved is None else [k for k in saved if k not in encoded]
+        fields = []
+        for k, v in encoded.items():
+            if saved is None or saved.get(k) != v:
+                fields.extend((k, v))
+        self._script(
+            self._save_script,
+            keys=[self.getKey(job.id)],
+            args=[self.ns, job.id, time.time(), 1 if saved is None else 0,
+                  len(removed), *removed, *fields],
+            client=client,
+        )
+        job._saved = encoded
+
+    def _loadJob(self, job_id, data):
+        """Job from its raw hash, remembering the hash so saveState writes only changes."""
+        job = Job(**decode_job(data, job_id))
+        job._saved = data
+        return job
+
     def getData(self, job_id):
         key = self.getKey(job_id)
-        return self._client.hgetall(key)
+        return decode_job(self._client.hgetall(key), job_id)
+
+    def getJob(self, job_id):
+        """The job with this id, or None if it does not exist."""
+        data = self._client.hgetall(self.getKey(job_id))
+        return self._loadJob(job_id, data) if data else None
 
     def incrementAttempts(self, job):
         job.attempts+=1
@@ -34,148 +229,587 @@ class Storage:
 
     # Entry into the redis queue
     def enqueue(self, jobPayload: Job):
-        # jobPayload = (Job.new(job)).__dict__
-        # key = self.getKey(job.id)
-        # self._client.hset(key, mapping=job.__dict__)
-        self.saveState(jobPayload)
-        self._client.rpush(f"{self.ns}:queue:pending", jobPayload.id)
+        self.enqueue_many([jobPayload])
+
+    def enqueue_many(self, jobs, chunk_size=1000):
+        """
+        Enqueue an iterable of jobs, one script call per chunk.
+        Each call writes the job hashes, indexes them and pushes the ids onto
+        the pending list atomically. The iterable is consumed lazily, so only
+        one chunk is held in memory. Returns the number of jobs enqueued;
+        raises ValueError at a job that depends on itself.
+        """
+        total = 0
+        chunk = []
+        for job in jobs:
+            if job.id in job.depends_on.split(","):
+                raise ValueError(f"Job {job.id} depends on itself")
+            chunk.append(job)
+            if len(chunk) >= chunk_size:
+                total += self._enqueueChunk(chunk)
+                chunk = []
+        if chunk:
+            total += self._enqueueChunk(chunk)
+        return total
+
+    def enqueue_workflow(self, jobs, chunk_size=1000):
+        """
+        Enqueue a batch of jobs whose depends_on may name each other (or jobs
+        already in Redis), e.g. a DAG built with Job.new(..., depends_on=[...]).
+        Jobs are written parents first, so the whole graph is linked in
+        O(jobs + edges) work. Raises ValueError on a dependency cycle or
+        duplicate id. Returns the number of jobs enqueued.
+        """
+        by_id = {}
+        for job in jobs:
+            if job.id in by_id:
+                raise ValueError(f"Duplicate job id {job.id}")
+            by_id[job.id] = job
+        # Kahn's algorithm over the edges inside the batch
+        blockers = {job_id: 0 for job_id in by_id}
+        children = {}
+        for job in by_id.values():
+            for parent in filter(None, job.depends_on.split(",")):
+                if parent == job.id:
+                    raise ValueError(f"Job {job.id} depends on itself")
+                if parent in by_id:
+                    blockers[job.id] += 1
+                    children.setdefault(parent, []).append(job.id)
+        ready = [job_id for job_id, count in blockers.items() if count == 0]
+        ordered = []
+        while ready:
+            job_id = ready.pop()
+            ordered.append(by_id[job_id])
+            for child in children.get(job_id, ()):
+                blockers[child] -= 1
+                if blockers[child] == 0:
+                    ready.append(child)
+        if len(ordered) < len(by_id):
+            cycle = sorted(job_id for job_id, count in blockers.items() if count)
+            raise ValueError(f"Dependency cycle among jobs {', '.join(cycle[:10])}")
+        return self.enqueue_many(ordered, chunk_size=chunk_size)
+
+    def _applyDefaults(self, job):
+        """Fill in the options a job left to the shared config."""
+        if job.max_retries is None:
+            job.max_retries = int(self.config.get("max_retries"))
+        if job.timeout_seconds is None:
+            job.timeout_seconds = float(self.config.get("job_timeout"))
+
+    def _enqueueChunk(self, jobs):
+        args = [self.ns, time.time(), time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                jobState.JobState.WAITING.value, jobState.JobState.PENDING.value,
+                jobState.JobState.COMPLETED.value, jobState.JobState.DEAD.value]
+        for job in jobs:
+            self._applyDefaults(job)
+            encoded = encode_job(job.to_dict(), self.compact)
+            args.extend((job.id, len(encoded)))
+            for field in encoded.items():
+                args.extend(field)
+            job._saved = encoded
+            self.metrics.inc("jobs_enqueued_total", job.queue)
+        pipe = self._client.pipeline(transaction=False)
+        self._script(self._enqueue_script, args=args, client=pipe)
+        self.metrics.flush(pipe)
+        return self._execute(pipe)[0]
 
     # process jobs
-    def fetchNextJob(self):
+    def fetchNextJob(self, worker_id=None, block_timeout=0, priority_weights=None, queues=None):
         """
-        Atomically fetch the next job from the pending queue.
-        Uses Redis LPOP which is atomic - only one worker can pop a job at a time.
-        This prevents race conditions where multiple workers pick the same job.
+        Atomically claim the next job from the pending lists of the given queues
+        ({queue: weight}, default queue only when None).
+        The claim script picks a queue and then a priority list by weight, pops
+        the id (into the worker's processing list when a worker_id is given),
+        marks it PROCESSING and returns the hash in one round trip. Queues over
+        their rate or concurrency limit are skipped. Only when nothing can be
+        claimed and block_timeout > 0 does the worker wait, on one BLPOP across
+        the queues' wakeup lists (no longer than a throttled queue needs), and
+        then claims again.
         """
-        job_id = self._client.lpop(f"{self.ns}:queue:pending")
-        if not job_id:
+        weights = self._priorityWeights(priority_weights)
+        queues = queues or {DEFAULT_QUEUE: 1}
+        job, throttled_for = self._claim(worker_id, weights, queues)
+        if job is not None or not block_timeout or block_timeout <= 0:
+            return job
+
+        timeout = block_timeout
+        if throttled_for is not None:
+            timeout = min(timeout, max(throttled_for, 0.01))
+        signal_keys = [self.getQueuePrefix(queue) + "signal" for queue in queues]
+        if not self._client.blpop(signal_keys, timeout=timeout) and throttled_for is None:
             return None
-        
-        if isinstance(job_id, bytes):
-            job_id = job_id.decode('utf-8')
-        
+        return self._claim(worker_id, weights, queues)[0]
+
+    def _priorityWeights(self, priority_weights=None):
+        """Weight for every priority; ones the caller left out get weight 1."""
+        weights = {p.value: 1 for p in jobState.JobPriority}
+        weights.update(priority_weights or DEFAULT_PRIORITY_WEIGHTS)
+        return weights
+
+    def _claim(self, worker_id, weights, queues):
+        """Run the claim script. Returns (job or None, seconds until a throttled queue frees up or None)."""
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        args = [self.ns, jobState.JobState.PROCESSING.value, now, time.time(),
+                "" if worker_id is None else str(worker_id),
+                random.random(), random.random(), jobState.JobState.DELAYED.value,
+                LIMIT_RETRY_DELAY, len(queues)]
+        for queue, weight in queues.items():
+            args.extend((queue, weight))
+        for priority, weight in weights.items():
+            args.extend((priority, weight))
+        started = time.perf_counter()
+        result = self._claim_script(
+            keys=[] if worker_id is None else [self.getProcessingKey(worker_id)],
+            args=args,
+        )
+        self.metrics.observe("fetch_seconds", time.perf_counter() - started)
+        if not result:
+            return None, None
+
+        job_id = result[0]
+        if not job_id:
+            return None, float(result[1])
+        if len(result) == 1:
+            print(f"[WARNING] Job {job_id} was in queue but data not found - job may have been deleted")
+            return None, None
+
+        data = dict(zip(result[2::2], result[3::2]))
         try:
-            data = self.getData(job_id)
-            if not data:
-                print(f"[WARNING] Job {job_id} was in queue but data not found - job may have been deleted")
-                return None
-            
-            job = Job(**data)
-            self.changeState(jobState.JobState.PROCESSING.value, job)
-            return job
+            job = self._loadJob(job_id, data)
+            if result[1]:
+                self.metrics.observe("job_wait_seconds", max(time.time() - float(result[1]), 0), job.queue)
+            return job, None
         except Exception as e:
             print(f"[ERROR] Error processing job {job_id} after pop: {e}")
-            return None
-    
+            return None, None
+
+    def _releaseJob(self, client, job_id, worker_id):
+        """Drop a finished job from the worker's processing list and give back its concurrency slots."""
+        if worker_id is not None:
+            client.lrem(self.getProcessingKey(worker_id), 1, job_id)
+        self._script(self._release_limits_script, args=[
+            self.ns, job_id, time.time(), time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            jobState.JobState.DELAYED.value, jobState.JobState.PENDING.value,
+        ], client=client)
+
     # mark completed
-    def mark_completed(self, job: Job):
+    def mark_completed(self, job: Job, worker_id=None):
         job.state = jobState.JobState.COMPLETED.value
+        # An error from an earlier attempt no longer applies
+        job.last_error = ""
+        self.metrics.inc("jobs_completed_total", job.queue)
         # self.r.hset(f"{self.ns}:job:{job.id}", mapping=job.__dict__)
-        self.saveState(job)
+        pipe = self._client.pipeline()
+        self.saveState(job, client=pipe)
+        self._resolveDependents(pipe, job)
+        self._releaseJob(pipe, job.id, worker_id)
+        self.metrics.flush(pipe)
+        self._execute(pipe)
+
+    def _resolveDependents(self, client, job):
+        """Queue the release (or failure) of the jobs waiting on a completed (or dead) job."""
+        self._script(self._resolve_script, args=[
+            self.ns, job.id, time.time(), time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), job.state,
+            jobState.JobState.WAITING.value, jobState.JobState.PENDING.value,
+            jobState.JobState.COMPLETED.value, jobState.JobState.DEAD.value,
+        ], client=client)
     
     # failed jobs
-    def mark_failed(self, job: Job):
+    def mark_failed(self, job: Job, worker_id=None):
         self.incrementAttempts(job)
+        self.metrics.inc("jobs_failed_total", job.queue)
+        pipe = self._client.pipeline()
         if job.attempts >= int(job.max_retries):
-            job.state = "dead"
-            self._client.rpush(f"{self.ns}:queue:dead", job.id)
+            job.state = jobState.JobState.DEAD.value
+            self.metrics.inc("jobs_dead_total", job.queue)
+            pipe.rpush(f"{self.ns}:queue:dead", job.id)
         else:
-            job.state = "delayed"
-            delay = 2 ** job.attempts
-            run_at = int(time.time() + delay)
-            self._client.zadd(f"{self.ns}:queue:delayed", {job.id: run_at})
+            job.state = jobState.JobState.DELAYED.value
+            self.metrics.inc("jobs_retried_total", job.queue)
+            delay = float(self.config.get("backoff_base")) ** job.attempts
+            run_at = time.time() + delay
+            pipe.zadd(f"{self.ns}:queue:delayed", {job.id: run_at})
+            # Wake the scheduler in case this is now the earliest delayed job
+            pipe.publish(self.getSchedulerChannel(), run_at)
         # self.r.hset(f"{self.ns}:job:{job.id}", mapping=job.__dict__)
-        self.saveState(job)
+        self.saveState(job, client=pipe)
+        if job.state == jobState.JobState.DEAD.value:
+            self._resolveDependents(pipe, job)
+        self._releaseJob(pipe, job.id, worker_id)
+        self.metrics.flush(pipe)
+        self._execute(pipe)
 
     # delayed jobs to pending jobs
-    def moveReadyDelayedJob(self):
-        """
-        Atomically move ready delayed jobs to pending queue.
-        Uses Redis ZREMRANGEBYSCORE with ZRANGE to prevent race conditions
-        where multiple schedulers move the same jobs.
-        """
-        now = int(time.time())
-        delayed_key = f"{self.ns}:queue:delayed"
-        pending_key = f"{self.ns}:queue:pending"
-        
-        lua_script = """
-        local delayed_key = KEYS[1]
-        local pending_key = KEYS[2]
-        local now = tonumber(ARGV[1])
-        
-        -- Get all jobs ready to run (score <= now)
-        local jobs = redis.call('ZRANGEBYSCORE', delayed_key, 0, now)
-        
-        if #jobs == 0 then
-            return {}
-        end
-        
-        -- Remove jobs from delayed queue and add to pending queue atomically
-        local moved = {}
-        for i, job_id in ipairs(jobs) do
-            -- Remove from delayed (returns 1 if removed, 0 if not found)
-            local removed = redis.call('ZREM', delayed_key, job_id)
-            if removed == 1 then
-                -- Only add to pending if we successfully removed from delayed
-                redis.call('RPUSH', pending_key, job_id)
-                table.insert(moved, job_id)
-            end
-        end
-        
-        return moved
-        """
-        
+    def moveReadyDelayedJob(self, batch_size=1000):
+        """
+        Atomically move up to batch_size ready delayed jobs to the pending queue.
+        The promote script also sets each job's state and updated_at and
+        re-indexes it, so nothing is left to do from Python. Returns the number
+        of jobs taken off the delayed set; callers drain a large backlog by
+        calling again while it equals batch_size, letting other clients run
+        between slices.
+        """
         try:
-            # Execute Lua script atomically
-            moved_job_ids = self._client.eval(lua_script, 2, delayed_key, pending_key, str(now))
-            
-            # Update state for moved jobs
-            if moved_job_ids:
-                for job_id in moved_job_ids:
-                    if isinstance(job_id, bytes):
-                        job_id = job_id.decode('utf-8')
-                    
-                    try:
-                        data = self.getData(job_id)
-                        if data:
-                            job = Job(**data)
-                            self.changeState(jobState.JobState.PENDING.value, job)
-                    except Exception as e:
-                        print(f"[ERROR] Error updating state for moved job {job_id}: {e}")
+            return self._promote_script(
+                keys=[f"{self.ns}:queue:delayed"],
+                args=[self.ns, time.time(), batch_size, jobState.JobState.PENDING.value,
+                      time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())],
+            )
         except Exception as e:
-            print(f"[WARNING] Lua script failed, using fallback method: {e}")
-            jobs_ready = self._client.zrangebyscore(delayed_key, 0, now)
-            for job_id in jobs_ready:
-                try:
-                    removed = self._client.zrem(delayed_key, job_id)
-                    if removed:
-                        self._client.rpush(pending_key, job_id)
-                        data = self.getData(job_id)
-                        if data:
-                            job = Job(**data)
-                            self.changeState(jobState.JobState.PENDING.value, job)
-                except Exception as e:
-                    print(f"[ERROR] Error moving job {job_id}: {e}")
-    
+            print(f"[ERROR] Error moving delayed jobs: {e}")
+            return 0
+
+    # job output
+    def appendJobLog(self, job_id, entries, maxlen=10000):
+        """Append (stream, text) entries to a job's capped log stream in one round trip."""
+        pipe = self._client.pipeline(transaction=False)
+        for stream, data in entries:
+            pipe.xadd(self.getLogKey(job_id), {"stream": stream, "data": data},
+                      maxlen=maxlen, approximate=True)
+        pipe.execute()
+
+    def readJobLog(self, job_id, last_id="0", count=None, block=None):
+        """
+        Log entries after last_id as [(entry_id, {"stream", "data"}), ...].
+        block is in milliseconds; None returns immediately.
+        """
+        result = self._client.xread({self.getLogKey(job_id): last_id}, count=count, block=block)
+        return result[0][1] if result else []
+
+    def nextDelayedAt(self):
+        """Epoch time of the earliest delayed job, or None if there is none."""
+        first = self._client.zrange(f"{self.ns}:queue:delayed", 0, 0, withscores=True)
+        return first[0][1] if first else None
+
+    # Scheduler coordination
+    def subscribeScheduler(self):
+        """
+        Pub/sub handle that receives a message whenever a delayed job is added,
+        and the new version whenever the config changes.
+        """
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.getSchedulerChannel(), self.config.channel)
+        return pubsub
+
+    def subscribeEvents(self):
+        """
+        Pub/sub handle receiving every job state transition as
+        "job_id\told_state\tnew_state\tqueue" (old_state is empty for new jobs).
+        """
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.getEventsChannel())
+        return pubsub
+
+    def acquireSchedulerLease(self, token, ttl):
+        """Take or renew the scheduler leader lease for ttl seconds."""
+        return self._acquire_lease_script(
+            keys=[f"{self.ns}:scheduler:leader"], args=[token, int(ttl * 1000)]
+        ) == 1
+
+    def releaseSchedulerLease(self, token):
+        self._release_lease_script(keys=[f"{self.ns}:scheduler:leader"], args=[token])
+
+    # Cron schedules
+    def setCron(self, name, expr, job: Job):
+        """
+        Create or replace the schedule name, which enqueues a copy of job (new
+        id aside) at every fire time of the cron expression expr. Returns the
+        first fire time; raises ValueError for an invalid expression.
+        """
+        next_at = CronExpression(expr).next_after(time.time())
+        # Options left to the config are resolved at each fire time
+        template = {k: v for k, v in job.to_dict().items() if k in CRON_JOB_FIELDS and v is not None}
+        pipe = self._client.pipeline()
+        pipe.delete(self.getCronKey(name))
+        pipe.hset(self.getCronKey(name), mapping={
+            "expr": expr, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **template,
+        })
+        pipe.zadd(self.getCronKey(), {name: next_at})
+        # Wake the scheduler in case this is now the earliest fire time
+        pipe.publish(self.getSchedulerChannel(), next_at)
+        pipe.execute()
+        return next_at
+
+    def removeCron(self, name):
+        """Delete a schedule. Returns False if there was none; jobs it already enqueued stay."""
+        pipe = self._client.pipeline()
+        pipe.zrem(self.getCronKey(), name)
+        pipe.delete(self.getCronKey(name))
+        return bool(pipe.execute()[0])
+
+    def listCrons(self):
+        """Every schedule as a dict of its hash plus name and next_at, soonest first."""
+        entries = self._client.zrange(self.getCronKey(), 0, -1, withscores=True)
+        pipe = self._client.pipeline(transaction=False)
+        for name, _ in entries:
+            pipe.hgetall(self.getCronKey(name))
+        return [{"name": name, "next_at": next_at, **schedule}
+                for (name, next_at), schedule in zip(entries, pipe.execute())]
+
+    def nextCronAt(self):
+        """Epoch time of the earliest cron fire time, or None if there is no schedule."""
+        first = self._client.zrange(self.getCronKey(), 0, 0, withscores=True)
+        return first[0][1] if first else None
+
+    def fireDueCrons(self, batch_size=1000):
+        """
+        Enqueue the job of up to batch_size due schedules and move each one to
+        its next fire time, in one script call. A schedule whose ticks were
+        missed (no scheduler running) fires once for the oldest and resumes
+        from now. The script re-checks every tick, so concurrent callers never
+        enqueue one twice. Returns the number of due schedules read; callers
+        drain a backlog by calling again while it equals batch_size.
+        """
+        now = time.time()
+        due = self._client.zrangebyscore(self.getCronKey(), "-inf", now, start=0, num=batch_size,
+                                         withscores=True)
+        if not due:
+            return 0
+        pipe = self._client.pipeline(transaction=False)
+        for name, _ in due:
+            pipe.hgetall(self.getCronKey(name))
+        schedules = pipe.execute()
+
+        args = [self.ns, now]
+        queues = {}
+        for (name, tick), schedule in zip(due, schedules):
+            try:
+                next_at = CronExpression(schedule["expr"]).next_after(max(now, tick))
+            except (KeyError, ValueError) as e:
+                print(f"[ERROR] Dropping cron schedule {name}: {e}")
+                self._client.zrem(self.getCronKey(), name)
+                continue
+            job = Job.new(job_id=f"{name}-{int(tick)}",
+                          **{k: schedule[k] for k in CRON_JOB_FIELDS if k in schedule})
+            self._applyDefaults(job)
+            encoded = encode_job(job.to_dict(), self.compact)
+            args.extend((name, tick, next_at, job.id, len(encoded)))
+            for field in encoded.items():
+                args.extend(field)
+            queues[job.id] = job.queue
+        if queues:
+            enqueued = self._fire_cron_script(keys=[self.getCronKey()], args=args)
+            for job_id in enqueued:
+                self.metrics.inc("jobs_enqueued_total", queues[job_id])
+            if enqueued:
+                pipe = self._client.pipeline(transaction=False)
+                self.metrics.flush(pipe)
+                pipe.execute()
+        return len(due)
+
+    # Rate limits and concurrency caps
+    def setLimit(self, scope, rate=None, burst=None, concurrency=None):
+        """
+        Create or update a scope's limit. rate is in jobs per second and burst
+        is how many may start back to back (default: one second's worth);
+        concurrency caps jobs running at once. Fields left as None are kept,
+        0 removes that part of the limit.
+        """
+        fields = {}
+        if rate is not None:
+            fields["rate"] = rate
+        if burst is not None:
+            fields["burst"] = max(burst, 1)
+        if concurrency is not None:
+            fields["concurrency"] = concurrency
+        pipe = self._client.pipeline()
+        if fields:
+            pipe.hset(self.getLimitKey(scope), mapping=fields)
+        pipe.sadd(f"{self.ns}:limits", scope)
+        pipe.execute()
+        self._releaseHeld(scope)
+
+    def clearLimit(self, scope):
+        """Remove a scope's limit. Jobs still counted against it release their slots as usual."""
+        pipe = self._client.pipeline()
+        pipe.delete(self.getLimitKey(scope))
+        pipe.srem(f"{self.ns}:limits", scope)
+        pipe.execute()
+        self._releaseHeld(scope)
+
+    def _releaseHeld(self, scope):
+        """Release the jobs held for a tag scope into the slots its (new) limit allows."""
+        kind, _, tag = scope.partition(":")
+        if kind != "tag":
+            return
+        self._release_held_script(args=[
+            self.ns, tag, time.time(), time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            jobState.JobState.DELAYED.value, jobState.JobState.PENDING.value,
+        ])
+
+    def listLimits(self):
+        """{scope: {"rate", "burst", "concurrency", "active"}} for every configured limit."""
+        scopes = sorted(self._client.smembers(f"{self.ns}:limits"))
+        pipe = self._client.pipeline(transaction=False)
+        for scope in scopes:
+            pipe.hmget(self.getLimitKey(scope), "rate", "burst", "concurrency")
+            pipe.scard(self.getLimitKey(scope) + ":active")
+        results = pipe.execute()
+        limits = {}
+        for scope, (rate, burst, concurrency), active in zip(scopes, results[::2], results[1::2]):
+            limits[scope] = {
+                "rate": float(rate or 0),
+                "burst": float(burst) if burst else max(float(rate or 0), 1.0),
+                "concurrency": int(concurrency or 0),
+                "active": active,
+            }
+        return limits
+
+    def getMetrics(self):
+        """All recorded metrics in Prometheus text format."""
+        return metrics.render(self._client.hgetall(self.metrics.key))
+
     def getSummary(self):
-        keys = self._client.keys(f"{self.ns}:job:*")
-        summary = {}
-        for k in keys:
-            state = self._client.hget(k, "state")
-            summary[state] = summary.get(state, 0) + 1
-        return summary
-
-    def listJobs(self, state=None):
-        keys = self._client.keys(f"{self.ns}:job:*")
+        """Job counts per state, read from the counters kept by saveState."""
+        counts = self._client.hgetall(f"{self.ns}:counts")
+        return {state: int(n) for state, n in counts.items() if int(n) > 0}
+
+    def getQueueSummary(self):
+        """Job counts per state for every queue that has seen a job, {queue: {state: n}}."""
+        queues = sorted(self._client.smembers(f"{self.ns}:queues") | {DEFAULT_QUEUE})
+        pipe = self._client.pipeline(transaction=False)
+        for queue in queues:
+            pipe.hgetall(f"{self.ns}:counts:{queue}")
+        return {
+            queue: {state: int(n) for state, n in counts.items() if int(n) > 0}
+            for queue, counts in zip(queues, pipe.execute())
+        }
+
+    def listJobs(self, state=None, queue=None):
+        job_ids = self._client.zrange(self.getIndexKey(state, queue), 0, -1)
+        return self._getMany(job_ids)
+
+    def listJobsPage(self, state=None, cursor=0, limit=100, order="desc", batch_size=500, queue=None):
+        """
+        One page of jobs from the state index (or the all-jobs index), of one
+        queue when queue is given.
+        The cursor is an offset into the index, ordered by update time
+        ("desc" = newest first). Returns the jobs, the cursor for the next page
+        (None on the last page) and the total size of the index.
+        """
+        cursor = max(int(cursor or 0), 0)
+        limit = max(int(limit), 1)
+        index_key = self.getIndexKey(state, queue)
+
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zrange(index_key, cursor, cursor + limit - 1, desc=(order != "asc"))
+        pipe.zcard(index_key)
+        job_ids, total = pipe.execute()
+
+        next_cursor = cursor + len(job_ids)
+        return {
+            "jobs": self._getMany(job_ids, batch_size=batch_size),
+            "next_cursor": next_cursor if next_cursor < total else None,
+            "total": total,
+        }
+
+    def getJobs(self, job_ids):
+        """Job hashes for a list of ids, skipping jobs that no longer exist."""
+        return self._getMany(job_ids)
+
+    # Retention
+    def expiredJobIds(self, state, max_age=None, max_count=None, limit=500):
+        """
+        Up to limit ids of jobs in state that are past a retention limit,
+        oldest first: in the state longer than max_age seconds, or beyond the
+        max_count most recent ones.
+        """
+        index_key = self.getIndexKey(state)
+        job_ids = []
+        if max_count is not None:
+            excess = self._client.zcard(index_key) - max_count
+            if excess > 0:
+                job_ids = self._client.zrange(index_key, 0, min(excess, limit) - 1)
+        if max_age is not None and len(job_ids) < limit:
+            # Index scores are the time the job entered the state. Both limits
+            # select a prefix of the index, so the longer one covers the other.
+            expired = self._client.zrangebyscore(index_key, "-inf", time.time() - max_age,
+                                                 start=0, num=limit)
+            if len(expired) > len(job_ids):
+                job_ids = expired
+        return job_ids
+
+    def deleteJobs(self, job_ids, state):
+        """Delete jobs still in state, with their logs, index entries and counts. Returns the number deleted."""
+        if not job_ids:
+            return 0
+        return self._delete_script(args=[self.ns, state.upper(), jobState.JobState.DEAD.value, *job_ids])
+
+    def _getMany(self, job_ids, batch_size=500):
+        """HGETALL a list of job ids in pipelined batches, skipping deleted jobs."""
         jobs = []
-        for k in keys:
-            j = self._client.hgetall(k)
-            if state and j.get("state") != state:
-                continue
-            jobs.append(j)
+        for i in range(0, len(job_ids), batch_size):
+            pipe = self._client.pipeline(transaction=False)
+            for job_id in job_ids[i:i + batch_size]:
+                pipe.hgetall(self.getKey(job_id))
+            jobs.extend(decode_job(data, job_id)
+                        for job_id, data in zip(job_ids[i:i + batch_size], pipe.execute()) if data)
         return jobs
 
+    def rebuildIndexes(self):
+        """
+        Rebuild the state indexes and counters from the job hashes with SCAN.
+        Needed once for jobs written before indexing existed; run it while no
+        workers are active, since live transitions are not fenced off.
+        """
+        prefix = f"{self.ns}:job:"
+        index_keys = [
+            key
+            for pattern in (f"{self.ns}:index:*", f"{self.ns}:jobs:*", f"{self.ns}:counts:*")
+            for key in self._client.scan_iter(match=pattern)
+        ]
+        self._client.delete(f"{self.ns}:counts", f"{self.ns}:jobs", *index_keys)
+
+        total = 0
+        batch = []
+        for key in self._client.scan_iter(match=f"{prefix}*", count=1000):
+            if ":" in key[len(prefix):]:
+                continue  # per-job sub-keys, not job hashes
+            batch.append(key)
+            if len(batch) >= 500:
+                total += self._reindexBatch(batch)
+                batch = []
+        if batch:
+            total += self._reindexBatch(batch)
+        return total
+
+    def _reindexBatch(self, keys):
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            # Both encodings: full names, then the compact ones
+            pipe.hmget(key, "state", "updated_at", "queue",
+                       *(COMPACT_FIELDS[name] for name in ("state", "updated_at", "queue")))
+        rows = pipe.execute()
+
+        pipe = self._client.pipeline(transaction=False)
+        prefix = f"{self.ns}:job:"
+        for key, row in zip(keys, rows):
+            job_id = key[len(prefix):]
+            compact = row[3] is not None
+            state, updated_at, queue = row[3:] if compact else row[:3]
+            if not state:
+                continue
+            state = state.upper()
+            queue = queue or DEFAULT_QUEUE
+            score = float(updated_at) if compact else _parse_timestamp(updated_at)
+            pipe.hset(key, COMPACT_FIELDS["state"] if compact else "state", state)
+            pipe.zadd(self.getIndexKey(state), {job_id: score})
+            pipe.zadd(self.getIndexKey(), {job_id: score})
+            pipe.hincrby(f"{self.ns}:counts", state, 1)
+            pipe.zadd(self.getIndexKey(state, queue), {job_id: score})
+            pipe.zadd(self.getIndexKey(queue=queue), {job_id: score})
+            pipe.hincrby(f"{self.ns}:counts:{queue}", state, 1)
+            pipe.sadd(f"{self.ns}:queues", queue)
+        pipe.execute()
+        return len(keys)
+
     # Worker registry methods
+    def allocateWorkerIds(self, count=1):
+        """Reserve count consecutive worker ids, unique across hosts. Returns the first one."""
+        return self._allocate_ids_script(
+            keys=[f"{self.ns}:worker:seq", f"{self.ns}:workers:active"], args=[count]
+        )
+
     def register_worker(self, worker_id: int, pid: int, parent_pid: int = None):
         """Register a worker in Redis so it can be stopped from any terminal."""
         worker_key = f"{self.ns}:worker:{worker_id}"
@@ -185,24 +819,81 @@ class Storage:
             "parent_pid": str(parent_pid) if parent_pid else "",
             "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
         }
-        self._client.hset(worker_key, mapping=worker_data)
+        pipe = self._client.pipeline()
+        pipe.hset(worker_key, mapping=worker_data)
         # Add to set of active workers
-        self._client.sadd(f"{self.ns}:workers:active", worker_id)
+        pipe.sadd(f"{self.ns}:workers:active", worker_id)
+        pipe.zadd(f"{self.ns}:workers:heartbeat", {worker_id: time.time()})
+        pipe.execute()
     
     def unregister_worker(self, worker_id: int):
         """Unregister a worker from Redis."""
         worker_key = f"{self.ns}:worker:{worker_id}"
-        self._client.delete(worker_key)
-        self._client.srem(f"{self.ns}:workers:active", worker_id)
+        pipe = self._client.pipeline()
+        pipe.delete(worker_key)
+        pipe.srem(f"{self.ns}:workers:active", worker_id)
+        pipe.zrem(f"{self.ns}:workers:heartbeat", worker_id)
+        self.metrics.flush(pipe)
+        pipe.execute()
+
+    def heartbeat(self, worker_id: int, stats=None):
+        """
+        Record that a worker is alive, flushing any metrics buffered since the
+        last write and storing stats (fields for its registry hash), and reload
+        the config if its version moved on. Returns True if the config was
+        reloaded.
+        """
+        pipe = self._client.pipeline(transaction=False)
+        pipe.get(self.config.version_key)
+        pipe.zadd(f"{self.ns}:workers:heartbeat", {worker_id: time.time()})
+        if stats:
+            pipe.hset(f"{self.ns}:worker:{worker_id}", mapping=stats)
+        self.metrics.flush(pipe)
+        return self.config.refresh(pipe.execute()[0])
+
+    def reapWorker(self, worker_id, cutoff=None):
+        """
+        Recover the jobs held in a worker's processing list and remove the worker
+        from the registry. With a cutoff, nothing happens if the worker has
+        heartbeated since then. Returns the number of jobs recovered, or -1 if
+        the worker turned out to be alive.
+        """
+        return self._reap_script(args=[
+            self.ns, worker_id, "" if cutoff is None else cutoff, time.time(),
+            time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            jobState.JobState.PROCESSING.value, jobState.JobState.PENDING.value,
+            jobState.JobState.DEAD.value, jobState.JobState.WAITING.value,
+            jobState.JobState.DELAYED.value,
+        ])
+
+    def reapDeadWorkers(self, timeout):
+        """
+        Reap every worker whose last heartbeat is older than timeout seconds.
+        Only expired workers and the jobs they hold are touched. Returns
+        {worker_id: jobs recovered}.
+        """
+        cutoff = time.time() - timeout
+        expired = self._client.zrangebyscore(f"{self.ns}:workers:heartbeat", "-inf", cutoff)
+        reaped = {}
+        for worker_id in expired:
+            recovered = self.reapWorker(worker_id, cutoff)
+            if recovered >= 0:
+                reaped[worker_id] = recovered
+        return reaped
     
     def list_workers(self):
         """Get list of all registered workers."""
-        worker_ids = self._client.smembers(f"{self.ns}:workers:active")
-        workers = []
+        worker_ids = list(self._client.smembers(f"{self.ns}:workers:active"))
+        pipe = self._client.pipeline(transaction=False)
         for worker_id in worker_ids:
-            worker_key = f"{self.ns}:worker:{worker_id}"
-            worker_data = self._client.hgetall(worker_key)
+            pipe.hgetall(f"{self.ns}:worker:{worker_id}")
+            pipe.zscore(f"{self.ns}:workers:heartbeat", worker_id)
+        results = pipe.execute()
+        workers = []
+        for worker_data, last_heartbeat in zip(results[::2], results[1::2]):
             if worker_data:
+                if last_heartbeat is not None:
+                    worker_data["last_heartbeat"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(last_heartbeat))
                 workers.append(worker_data)
         return workers
     
@@ -1,5 +1,9 @@
+import queuectl.jobState as jobState
+from queuectl.executor import CallableExecutor
+from queuectl.profiler import Profiler
 from queuectl.storage import Storage
-import subprocess
+import asyncio
+import codecs
 import multiprocessing
 import time
 import os
@@ -7,97 +11,231 @@ import signal
 import sys
 
 
+def _limited_command(job):
+    """Prefix a job's shell command with ulimit calls for its CPU/memory limits."""
+    if os.name != "posix":
+        return job.command
+    limits = []
+    if job.cpu_limit > 0:
+        limits.append(f"ulimit -t {job.cpu_limit} || exit 126")
+    if job.memory_limit > 0:
+        limits.append(f"ulimit -v {job.memory_limit * 1024} || exit 126")
+    if not limits:
+        return job.command
+    return "\n".join(limits + [job.command])
+
+
+def _exit_reason(returncode):
+    """Human-readable reason for a non-zero exit, naming the signal if there was one."""
+    if returncode < 0:
+        signum = -returncode
+    elif returncode > 128:
+        signum = returncode - 128  # shell convention for a child killed by a signal
+    else:
+        return f"exit code {returncode}"
+    try:
+        name = signal.Signals(signum).name
+    except ValueError:
+        return f"exit code {returncode}"
+    reason = f"killed by {name}" if returncode < 0 else f"exit code {returncode} ({name})"
+    if name == "SIGXCPU":
+        reason += ", cpu limit exceeded"
+    return reason
+
+
+async def _kill_job_process(proc, grace=2):
+    """Terminate a job's whole process group, escalating to SIGKILL after grace seconds."""
+    if os.name != "posix":
+        proc.kill()
+        await proc.wait()
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        pass
+    # Also catches children that outlived the shell or ignored SIGTERM
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+
+class JobOutput:
+    """
+    Streams one job attempt's stdout/stderr into its capped Redis log stream.
+    Chunks are decoded incrementally and written in small batches; anything
+    past max_bytes is read and dropped, so worker memory stays flat however
+    much a job prints. The last few hundred characters of each stream are
+    kept for the worker's own log line.
+    """
+
+    TAIL_CHARS = 500
+
+    def __init__(self, storage: Storage, job, max_bytes: int, flush_bytes: int = 32768, flush_interval: float = 0.2):
+        self.storage = storage
+        self.job = job
+        self.max_bytes = max_bytes
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.tail = {"stdout": "", "stderr": ""}
+        self._entries = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self._entries.append(("meta", f"attempt {self.job.attempts + 1} started"))
+        await self.flush()
+
+    async def pump(self, reader, name):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            self._add(name, decoder.decode(chunk), len(chunk))
+            if self._buffered >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+                await self.flush()
+        self._add(name, decoder.decode(b"", final=True), 0)
+
+    def _add(self, name, text, size):
+        if not text:
+            return
+        self.tail[name] = (self.tail[name] + text)[-self.TAIL_CHARS:]
+        remaining = self.max_bytes - self.written
+        if remaining <= 0:
+            self.dropped += size
+            return
+        if size > remaining:
+            text = text[:remaining]
+            self.dropped += size - remaining
+            size = remaining
+        self._entries.append((name, text))
+        self.written += size
+        self._buffered += size
+
+    async def flush(self):
+        async with self._lock:
+            entries, self._entries = self._entries, []
+            self._buffered = 0
+            self._last_flush = time.monotonic()
+            if entries:
+                await asyncio.to_thread(self.storage.appendJobLog, self.job.id, entries)
+
+    def write(self, name, text):
+        """Add output that did not come through a pipe (a python job's captured prints)."""
+        self._add(name, text, len(text.encode("utf-8")))
+
+    async def finish(self, returncode, reason=None):
+        if reason:
+            self._entries.append(("meta", reason))
+        if self.dropped:
+            self._entries.append(("meta", f"output truncated: {self.dropped} byte(s) over the {self.max_bytes} byte limit dropped"))
+        self._entries.append(("meta", f"exited with code {returncode}"))
+        await self.flush()
+
+
+class WorkerStats:
+    """
+    Time a worker spends in each phase of its loop since it started: count,
+    total and longest per phase. Each phase costs two perf_counter() calls;
+    the totals reach Redis in the worker's registry hash with every heartbeat.
+    With concurrency > 1 the job phases of different jobs overlap.
+    """
+
+    # stop_check: stop-signal round trip; fetch: fetchNextJob calls that
+    # returned a job, idle: those that did not; spawn: starting the command;
+    # run: the command up to its last output; finish: mark_completed/mark_failed
+    PHASES = ("stop_check", "fetch", "idle", "spawn", "run", "finish")
+
+    def __init__(self):
+        self._phases = {phase: [0, 0.0, 0.0] for phase in self.PHASES}
+
+    def add(self, phase, seconds):
+        entry = self._phases[phase]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def fields(self):
+        """Registry hash fields: {phase}_count, {phase}_seconds and {phase}_max."""
+        fields = {}
+        for phase, (count, total, longest) in self._phases.items():
+            fields[f"{phase}_count"] = count
+            fields[f"{phase}_seconds"] = round(total, 6)
+            fields[f"{phase}_max"] = round(longest, 6)
+        return fields
+
+    @classmethod
+    def parse(cls, worker_data):
+        """{phase: (count, total, longest)} from a registry hash, skipping phases it lacks."""
+        phases = {}
+        for phase in cls.PHASES:
+            if f"{phase}_count" in worker_data:
+                phases[phase] = (int(worker_data[f"{phase}_count"]), float(worker_data[f"{phase}_seconds"]),
+                                 float(worker_data[f"{phase}_max"]))
+        return phases
+
+
 class WorkerProcess:
-    def __init__(self, storage:Storage, worker_id: int):
+    def __init__(self, storage:Storage, worker_id: int, block_timeout: float = 0, concurrency: int = 1,
+                 heartbeat_interval: float = 5, log_max_bytes: int = 1048576, priority_weights: dict = None,
+                 queues: dict = None, profile: str = None, profile_interval: float = 300,
+                 profile_window: float = 10, profile_dir: str = None, python_pool: int = 0,
+                 preload: list = None):
         self.storage = storage
         self.worker_id = worker_id
         self.pid = os.getpid()
+        # Seconds to block on Redis waiting for a job; 0 falls back to polling
+        self.block_timeout = block_timeout
+        # Jobs this process runs at once (asyncio subprocesses)
+        self.concurrency = max(int(concurrency), 1)
+        # Seconds between heartbeats; the reaper recovers our jobs if they stop
+        self.heartbeat_interval = heartbeat_interval
+        # Output kept per job attempt in its Redis log stream
+        self.log_max_bytes = log_max_bytes
+        # Share of claims per priority; None uses the storage defaults
+        self.priority_weights = priority_weights
+        # Queues served and their share of claims; None serves the default queue
+        self.queues = queues
+        self.stats = WorkerStats()
+        # Child processes for python jobs (default one per slot); forked on the
+        # first python job, or at start when there are modules to preload
+        self.executor = CallableExecutor(python_pool or self.concurrency, preload or ())
+        self.preload = preload
+        # Sampling profiler ("cpu" or "memory"), off when None
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler(profile, f"worker-{worker_id}", profile_dir,
+                                     interval=profile_interval, window=profile_window)
 
     def start(self):
+        # Recover jobs a previous run of this worker id left in its processing
+        # list, unless something with this id is still heartbeating
+        try:
+            cutoff = time.time() - float(self.storage.config.get("heartbeat_timeout"))
+            requeued = self.storage.reapWorker(self.worker_id, cutoff)
+            if requeued < 0:
+                print(f"[Worker {self.worker_id}] Another worker with this id is alive, not requeueing its jobs")
+            elif requeued:
+                print(f"[Worker {self.worker_id}] Requeued {requeued} unfinished job(s)")
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Error requeueing unfinished jobs: {e}")
+
         # Register this worker in Redis
         self.storage.register_worker(self.worker_id, self.pid)
-        print(f"[Worker {self.worker_id}] Started (PID: {self.pid})")
+        queues = ", ".join(self.queues) if self.queues else "default"
+        print(f"[Worker {self.worker_id}] Started (PID: {self.pid}, concurrency: {self.concurrency}, queues: {queues})")
         
         try:
-            while True:
-                # Check Redis for stop signal
-                try:
-                    if self.storage.check_stop_signal(self.worker_id):
-                        print(f"[Worker {self.worker_id}] Stop signal received")
-                        break
-                except Exception as e:
-                    print(f"[Worker {self.worker_id}] Error checking stop signal: {e}")
-                    # Continue anyway - don't let Redis errors stop the worker
-                
-                # Fetch next job
-                try:
-                    job = self.storage.fetchNextJob()
-                except Exception as e:
-                    print(f"[Worker {self.worker_id}] Error fetching next job: {e}")
-                    time.sleep(0.5)
-                    continue
-                
-                if not job:
-                    time.sleep(0.5)
-                    continue
-                
-                # Wrap entire job processing in try-except to ensure worker continues even on errors
-                try:
-                    print(f"[Worker {self.worker_id}] Processing job {job.id}: {job.command}")
-                    
-                    # Execute the command
-                    try:
-                        result = subprocess.run(
-                            job.command,
-                            shell=True,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            stdin=subprocess.DEVNULL,
-                            text=True,
-                            timeout=None
-                        )
-                        
-                        # Handle command result
-                        if result.returncode == 0:
-                            # Command succeeded
-                            try:
-                                self.storage.mark_completed(job)
-                                print(f"[Worker {self.worker_id}] Job {job.id} completed successfully")
-                                if result.stdout:
-                                    print(f"[Worker {self.worker_id}] Job {job.id} output: {result.stdout}")
-                            except Exception as e:
-                                print(f"[Worker {self.worker_id}] Error marking job {job.id} as completed: {e}")
-                        else:
-                            # Command failed (non-zero return code)
-                            try:
-                                self.storage.mark_failed(job)
-                                print(f"[Worker {self.worker_id}] Job {job.id} failed with return code {result.returncode}")
-                                if result.stderr:
-                                    print(f"[Worker {self.worker_id}] Job {job.id} stderr: {result.stderr}")
-                                if result.stdout:
-                                    print(f"[Worker {self.worker_id}] Job {job.id} stdout: {result.stdout}")
-                            except Exception as e:
-                                print(f"[Worker {self.worker_id}] Error marking job {job.id} as failed: {e}")
-                                
-                    except subprocess.TimeoutExpired:
-                        # Command timed out (if timeout was set)
-                        try:
-                            self.storage.mark_failed(job)
-                            print(f"[Worker {self.worker_id}] Job {job.id} timed out")
-                        except Exception as e:
-                            print(f"[Worker {self.worker_id}] Error handling timeout for job {job.id}: {e}")
-                    except Exception as e:
-                        # Error executing command (e.g., command not found, permission denied, etc.)
-                        try:
-                            self.storage.mark_failed(job)
-                            print(f"[Worker {self.worker_id}] Error executing job {job.id}: {type(e).__name__}: {e}")
-                        except Exception as storage_error:
-                            print(f"[Worker {self.worker_id}] Error marking job {job.id} as failed: {storage_error}")
-                            
-                except Exception as e:
-                    # Catch-all for any unexpected errors in job processing
-                    print(f"[Worker {self.worker_id}] Unexpected error processing job {job.id if 'job' in locals() else 'unknown'}: {type(e).__name__}: {e}")
-                    # Continue to next iteration - don't let one bad job stop the worker
+            asyncio.run(self._run())
         finally:
             # Unregister and cleanup
             self.storage.unregister_worker(self.worker_id)
@@ -105,11 +243,224 @@ class WorkerProcess:
             print(f"[Worker {self.worker_id}] Stopped (PID: {self.pid})")
             sys.exit(0)
 
+    async def _run(self):
+        """
+        Fetch loop. Up to `concurrency` jobs run at once; Redis calls go through
+        a thread so a blocking fetch never stalls jobs that are finishing.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        running = set()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        profiler = asyncio.create_task(self.profiler.run()) if self.profiler else None
+        if self.preload:
+            self.executor.start()
+
+        def _done(task):
+            running.discard(task)
+            slots.release()
+
+        while True:
+            # Only fetch when a slot is free
+            await slots.acquire()
+
+            # Check Redis for stop signal
+            try:
+                started = time.perf_counter()
+                stop = await asyncio.to_thread(self.storage.check_stop_signal, self.worker_id)
+                self.stats.add("stop_check", time.perf_counter() - started)
+                if stop:
+                    print(f"[Worker {self.worker_id}] Stop signal received")
+                    slots.release()
+                    break
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Error checking stop signal: {e}")
+                # Continue anyway - don't let Redis errors stop the worker
+            
+            # Fetch next job
+            try:
+                started = time.perf_counter()
+                job = await asyncio.to_thread(self.storage.fetchNextJob, self.worker_id,
+                                             self.block_timeout, self.priority_weights, self.queues)
+                fetch_seconds = time.perf_counter() - started
+                self.stats.add("fetch" if job else "idle", fetch_seconds)
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Error fetching next job: {e}")
+                slots.release()
+                await asyncio.sleep(0.5)
+                continue
+            
+            if not job:
+                slots.release()
+                # A blocking fetch already waited on Redis; only sleep when polling
+                if not self.block_timeout:
+                    await asyncio.sleep(0.5)
+                continue
+
+            task = asyncio.create_task(self._process(job, fetch_seconds))
+            running.add(task)
+            task.add_done_callback(_done)
+
+        # Let in-flight jobs finish before unregistering
+        if running:
+            print(f"[Worker {self.worker_id}] Waiting for {len(running)} running job(s)...")
+            await asyncio.gather(*running, return_exceptions=True)
+        heartbeat.cancel()
+        if profiler:
+            profiler.cancel()
+        self.executor.close()
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                if await asyncio.to_thread(self.storage.heartbeat, self.worker_id, self.stats.fields()):
+                    print(f"[Worker {self.worker_id}] Reloaded config (version {self.storage.config.version})")
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Error sending heartbeat: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _finish(self, mark, job, timings):
+        """Record the attempt's phase timings on the job and save it with mark_completed/mark_failed."""
+        job.timings = ",".join(f"{phase}={seconds:.4f}" for phase, seconds in timings.items())
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(mark, job, self.worker_id)
+        finally:
+            self.stats.add("finish", time.perf_counter() - started)
+
+    async def _processCallable(self, job, fetch_seconds):
+        """Run a python job in the executor pool, storing its JSON return value as job.result."""
+        timings = {"fetch": fetch_seconds}
+        output = JobOutput(self.storage, job, self.log_max_bytes)
+        await output.start()
+        started = time.perf_counter()
+        try:
+            ok, value, printed = await self.executor.run(job.command, job.args,
+                                                         timeout=job.timeout_seconds or None)
+        except asyncio.TimeoutError:
+            ok, value, printed = False, f"timed out after {job.timeout_seconds:g}s", ""
+        except Exception as e:
+            ok, value, printed = False, f"{type(e).__name__}: {e}", ""
+        timings["run"] = time.perf_counter() - started
+        self.stats.add("run", timings["run"])
+        self.storage.metrics.observe("job_duration_seconds", timings["run"], job.queue)
+
+        output.write("stdout", printed)
+        if ok:
+            job.result = value
+            await output.finish(0)
+        else:
+            # First line is "ExceptionType: message"; the traceback goes to the log
+            job.last_error = value.splitlines()[0] if value else "failed"
+            output.write("stderr", value)
+            await output.finish(1, job.last_error)
+
+        mark = self.storage.mark_completed if ok else self.storage.mark_failed
+        try:
+            await self._finish(mark, job, timings)
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Error marking job {job.id} as {'completed' if ok else 'failed'}: {e}")
+            return
+        if ok:
+            print(f"[Worker {self.worker_id}] Job {job.id} completed successfully, result: {job.result[:200]}")
+        else:
+            print(f"[Worker {self.worker_id}] Job {job.id} failed: {job.last_error}")
+
+    async def _process(self, job, fetch_seconds=0.0):
+        # Wrap entire job processing in try-except to ensure worker continues even on errors
+        try:
+            print(f"[Worker {self.worker_id}] Processing job {job.id}: {job.command}")
+            if job.kind == jobState.JobKind.PYTHON.value:
+                await self._processCallable(job, fetch_seconds)
+                return
+
+            # Execute the command, streaming its output into the job's log
+            timings = {"fetch": fetch_seconds}
+            try:
+                started = time.monotonic()
+                spawn_started = time.perf_counter()
+                proc = await asyncio.create_subprocess_shell(
+                    _limited_command(job),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    # Own process group, so a timeout can kill everything the job spawned
+                    start_new_session=(os.name == "posix"),
+                )
+                run_started = time.perf_counter()
+                timings["spawn"] = run_started - spawn_started
+                self.stats.add("spawn", timings["spawn"])
+                output = JobOutput(self.storage, job, self.log_max_bytes)
+                await output.start()
+                timed_out = False
+                try:
+                    await asyncio.wait_for(
+                        asyncio.gather(
+                            output.pump(proc.stdout, "stdout"),
+                            output.pump(proc.stderr, "stderr"),
+                            proc.wait(),
+                        ),
+                        timeout=job.timeout_seconds or None,
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    await _kill_job_process(proc)
+                self.storage.metrics.observe("job_duration_seconds", time.monotonic() - started, job.queue)
+
+                if timed_out:
+                    job.last_error = f"timed out after {job.timeout_seconds:g}s"
+                elif proc.returncode != 0:
+                    job.last_error = _exit_reason(proc.returncode)
+                await output.finish(proc.returncode, job.last_error if proc.returncode != 0 else None)
+                timings["run"] = time.perf_counter() - run_started
+                self.stats.add("run", timings["run"])
+                
+                # Handle command result
+                if timed_out:
+                    try:
+                        await self._finish(self.storage.mark_failed, job, timings)
+                        print(f"[Worker {self.worker_id}] Job {job.id} {job.last_error}, killed")
+                    except Exception as e:
+                        print(f"[Worker {self.worker_id}] Error handling timeout for job {job.id}: {e}")
+                elif proc.returncode == 0:
+                    # Command succeeded
+                    try:
+                        await self._finish(self.storage.mark_completed, job, timings)
+                        print(f"[Worker {self.worker_id}] Job {job.id} completed successfully")
+                        if output.tail["stdout"]:
+                            print(f"[Worker {self.worker_id}] Job {job.id} output: {output.tail['stdout']}")
+                    except Exception as e:
+                        print(f"[Worker {self.worker_id}] Error marking job {job.id} as completed: {e}")
+                else:
+                    # Command failed (non-zero return code)
+                    try:
+                        await self._finish(self.storage.mark_failed, job, timings)
+                        print(f"[Worker {self.worker_id}] Job {job.id} failed: {job.last_error}")
+                        if output.tail["stderr"]:
+                            print(f"[Worker {self.worker_id}] Job {job.id} stderr: {output.tail['stderr']}")
+                        if output.tail["stdout"]:
+                            print(f"[Worker {self.worker_id}] Job {job.id} stdout: {output.tail['stdout']}")
+                    except Exception as e:
+                        print(f"[Worker {self.worker_id}] Error marking job {job.id} as failed: {e}")
+                        
+            except Exception as e:
+                # Error executing command (e.g., command not found, permission denied, etc.)
+                job.last_error = f"{type(e).__name__}: {e}"
+                try:
+                    await self._finish(self.storage.mark_failed, job, timings)
+                    print(f"[Worker {self.worker_id}] Error executing job {job.id}: {type(e).__name__}: {e}")
+                except Exception as storage_error:
+                    print(f"[Worker {self.worker_id}] Error marking job {job.id} as failed: {storage_error}")
+                    
+        except Exception as e:
+            # Catch-all for any unexpected errors in job processing
+            print(f"[Worker {self.worker_id}] Unexpected error processing job {job.id}: {type(e).__name__}: {e}")
+            # Continue with other jobs - don't let one bad job stop the worker
+
 # Top-level function for multiprocessing (required on Windows)
-def _worker_process_entry(worker_id: int):
+def _worker_process_entry(worker_id: int, options: dict):
     """Entry point for worker processes. Each process creates its own Storage instance."""
     worker_storage = Storage()
-    worker = WorkerProcess(worker_storage, worker_id)
+    worker = WorkerProcess(worker_storage, worker_id, **options)
     worker.start()
 
 
@@ -119,19 +470,17 @@ class WorkerManager:
         self.workers = []
         self.worker_ids = []
 
-    def start(self, count=1):
-        # Get next available worker IDs
-        print("Getting existing workers", len(self.workers))
-        existing_workers = self.storage.list_workers()
-        existing_ids = {int(w.get("worker_id", 0)) for w in existing_workers}
-        next_id = max(existing_ids) + 1 if existing_ids else 1
+    def start(self, count=1, **options):
+        """Start count worker processes; options are passed on to WorkerProcess."""
+        # Reserve the ids atomically so managers on other hosts get different ones
+        next_id = self.storage.allocateWorkerIds(count)
         
         # Use top-level function instead of bound method for Windows compatibility
         for i in range(count):
             worker_id = next_id + i
             p = multiprocessing.Process(
                 target=_worker_process_entry,
-                args=(worker_id,)
+                args=(worker_id, options)
             )
             p.start()
             self.workers.append(p)
@@ -182,10 +531,10 @@ class WorkerManager:
                                     os.kill(pid, signal.SIGKILL)
                         except (ProcessLookupError, OSError):
                             pass  # Process already dead
-                        self.storage.unregister_worker(int(worker.get("worker_id", 0)))
+                        self.storage.reapWorker(int(worker.get("worker_id", 0)))
                 except (ProcessLookupError, OSError):
                     # Process already dead
-                    self.storage.unregister_worker(int(worker.get("worker_id", 0)))
+                    self.storage.reapWorker(int(worker.get("worker_id", 0)))
                 except Exception as e:
                     print(f"[Manager] Error stopping worker {worker.get('worker_id')}: {e}")
         
@@ -233,12 +582,19 @@ class WorkerManager:
                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                     else:
                         os.kill(pid, signal.SIGKILL)
-                self.storage.unregister_worker(worker_id)
+                self.storage.reapWorker(worker_id)
             except (ProcessLookupError, OSError):
-                self.storage.unregister_worker(worker_id)
+                self.storage.reapWorker(worker_id)
         
         print(f"[Manager] Worker {worker_id} (PID: {pid}) stopped")
 
+    def reap(self, timeout):
+        """Recover jobs from workers whose heartbeat is older than timeout seconds."""
+        reaped = self.storage.reapDeadWorkers(timeout)
+        for worker_id, recovered in reaped.items():
+            print(f"[Manager] Reaped worker {worker_id}, recovered {recovered} job(s)")
+        return reaped
+
     def list_workers(self):
         """List all running workers."""
         return self.storage.list_workers()
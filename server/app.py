@@ -1,13 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import json
 import sys
 import os
+import time
 
 # Add parent directory to path to import queuectl
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from queuectl.storage import Storage
+from queuectl.asyncStorage import AsyncStorage
+from queuectl.redisConnection import RedisConnection
 from queuectl.config import Config
 
 app = FastAPI(title="QueueCTL API", version="1.0.0")
@@ -21,9 +25,171 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Upper bound on ?limit= so one request cannot pull the whole keyspace
+MAX_PAGE_SIZE = 1000
+
+# Seconds a status, page or metrics result is reused by later requests
+CACHE_TTL = 1.0
+
+storage = None
+
 def get_storage():
-    """Get a Storage instance."""
-    return Storage()
+    """The AsyncStorage created at startup, sharing one connection pool."""
+    return storage
+
+
+class CoalescingCache:
+    """
+    Shares one computation between concurrent callers and reuses its result
+    for ttl seconds. Callers asking for a key whose computation is still
+    running await that same task instead of starting another; failures are
+    not cached.
+    """
+
+    # Expired entries are swept once the cache grows past this
+    MAX_ENTRIES = 1000
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+
+    async def get(self, key, compute):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or (entry[1].done() and entry[0] <= now):
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._sweep(now)
+            entry = (now + self.ttl, asyncio.ensure_future(compute()))
+            self._entries[key] = entry
+        try:
+            # shield: one caller disconnecting must not cancel the others' result
+            return await asyncio.shield(entry[1])
+        except Exception:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            raise
+
+    def _sweep(self, now):
+        for key, (expires, task) in list(self._entries.items()):
+            if task.done() and expires <= now:
+                del self._entries[key]
+
+
+cache = CoalescingCache(CACHE_TTL)
+
+
+async def read_status(storage):
+    """Summary, per-queue counts and workers, as served by /api/status."""
+    summary, queues, workers = await asyncio.gather(
+        storage.getSummary(), storage.getQueueSummary(), storage.list_workers()
+    )
+    return {
+        "success": True,
+        "summary": summary,
+        "queues": queues,
+        "worker_count": len(workers),
+        "workers": workers,
+    }
+
+
+def cached_status():
+    return cache.get("status", lambda: read_status(get_storage()))
+
+
+class EventHub:
+    """
+    Fans job state transitions out to every /api/events client.
+    One Redis subscription serves the whole server. Transitions are batched
+    every flush_interval seconds, and each batch costs one status read no
+    matter how many clients are connected. The last status is kept in memory,
+    so a new client's snapshot needs no Redis reads at all.
+    """
+
+    # Most changed jobs sent per update; the rest only show up in the counts
+    MAX_JOBS_PER_UPDATE = 200
+
+    def __init__(self, flush_interval=0.5, resync_interval=10):
+        self.flush_interval = flush_interval
+        # Workers come and go without state transitions; re-read them this often
+        self.resync_interval = resync_interval
+        self.status = None
+        self._clients = set()
+        self._changes = {}
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._broadcast())]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def subscribe(self):
+        client = asyncio.Queue(maxsize=20)
+        self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        self._clients.discard(client)
+
+    async def _listen(self):
+        """Collect transitions from Redis pub/sub."""
+        while True:
+            try:
+                pubsub = await get_storage().subscribeEvents()
+                try:
+                    while True:
+                        message = await pubsub.get_message(timeout=1.0)
+                        if message is None:
+                            continue
+                        job_id, old_state, state, queue = message["data"].split("\t")
+                        self._changes[job_id] = {"id": job_id, "state": state, "queue": queue}
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Server] Event subscription error: {e}")
+                await asyncio.sleep(1)
+
+    async def _broadcast(self):
+        last_read = 0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            changes, self._changes = self._changes, {}
+            if not changes and time.time() - last_read < self.resync_interval:
+                continue
+            if not self._clients:
+                self.status = None  # stale by the time anyone connects
+                continue
+            try:
+                self.status = await read_status(get_storage())
+                last_read = time.time()
+            except Exception as e:
+                print(f"[Server] Error reading status: {e}")
+                continue
+            update = {**self.status, "jobs": list(changes.values())[:self.MAX_JOBS_PER_UPDATE]}
+            for client in list(self._clients):
+                if client.full():
+                    client.get_nowait()  # slow client: every update carries full counts, drop the oldest
+                client.put_nowait(update)
+
+
+hub = EventHub()
+
+
+@app.on_event("startup")
+async def startup():
+    global storage
+    # One async client and connection pool for every request
+    storage = AsyncStorage(client=RedisConnection.get_async_client())
+    hub.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    hub.stop()
+    await RedisConnection.close_async_client()
 
 @app.get("/")
 async def root():
@@ -34,52 +200,98 @@ async def root():
 async def api_status():
     """Get queue status summary."""
     try:
-        storage = get_storage()
-        summary = storage.getSummary()
-        
-        # Get worker count
-        workers = storage.list_workers()
+        return await cached_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/events")
+async def api_events(request: Request):
+    """
+    Server-sent events: a "snapshot" with the current status, then an "update"
+    with fresh counts and the jobs that changed state, whenever anything does.
+    """
+    client = hub.subscribe()
+
+    async def stream():
+        try:
+            snapshot = hub.status or await cached_status()
+            yield _sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    update = await asyncio.wait_for(client.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse("update", update)
+        finally:
+            hub.unsubscribe(client)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/jobs")
+async def api_jobs(cursor: int = 0, limit: int = 100, order: str = "desc", queue: str = None):
+    """Get a page of jobs, optionally from one queue."""
+    try:
+        limit = min(limit, MAX_PAGE_SIZE)
+        page = await cache.get(
+            ("jobs", None, queue, cursor, limit, order),
+            lambda: get_storage().listJobsPage(cursor=cursor, limit=limit, order=order, queue=queue),
+        )
         
         return {
             "success": True,
-            "summary": summary,
-            "worker_count": len(workers),
-            "workers": workers
+            "jobs": page["jobs"],
+            "count": len(page["jobs"]),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jobs")
-async def api_jobs():
-    """Get list of jobs."""
+@app.get("/api/jobs/{state}")
+async def api_jobs_by_state(state: str, cursor: int = 0, limit: int = 100, order: str = "desc",
+                            queue: str = None):
+    """Get a page of jobs by state, optionally from one queue."""
     try:
-        storage = get_storage()
-        jobs = storage.listJobs()
+        limit = min(limit, MAX_PAGE_SIZE)
+        page = await cache.get(
+            ("jobs", state.upper(), queue, cursor, limit, order),
+            lambda: get_storage().listJobsPage(state=state, cursor=cursor, limit=limit, order=order,
+                                               queue=queue),
+        )
         
         return {
             "success": True,
-            "jobs": jobs,
-            "count": len(jobs)
+            "jobs": page["jobs"],
+            "state": state,
+            "count": len(page["jobs"]),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jobs/{state}")
-async def api_jobs_by_state(state: str):
-    """Get jobs by state."""
+@app.get("/api/jobs/{job_id}/logs")
+async def api_job_logs(job_id: str, after: str = "0", limit: int = 1000):
+    """Get a job's captured output after the given log entry id."""
     try:
         storage = get_storage()
-        jobS = storage.listJobs(state=state)
-        jobL = storage.listJobs(state=state.upper())
-        jobList = jobS + jobL
-        
+        if not await storage.getData(job_id):
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        entries = await storage.readJobLog(job_id, last_id=after, count=min(limit, MAX_PAGE_SIZE))
         
         return {
             "success": True,
-            "jobs": jobList,
-            "state": state,
-            "count": len(jobList)
+            "job_id": job_id,
+            "entries": [{"id": entry_id, **fields} for entry_id, fields in entries],
+            "last_id": entries[-1][0] if entries else after
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,8 +299,7 @@ async def api_jobs_by_state(state: str):
 async def api_workers():
     """Get list of workers."""
     try:
-        storage = get_storage()
-        workers = storage.list_workers()
+        workers = (await cached_status())["workers"]
         
         return {
             "success": True,
@@ -98,6 +309,15 @@ async def api_workers():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Queue metrics in Prometheus text format."""
+    try:
+        text = await cache.get("metrics", lambda: get_storage().getMetrics())
+        return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000)
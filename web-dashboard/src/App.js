@@ -16,6 +16,7 @@ const DEFAULT_STATUS = {
 function App() {
   const [status, setStatus] = useState(DEFAULT_STATUS);
   const [error, setError] = useState(null);
+  const [changes, setChanges] = useState(null);
 
   // Fetch with timeout wrapper (prevents infinite waiting)
   const fetchWithTimeout = (url, timeout = 8000) => {
@@ -64,21 +65,36 @@ function App() {
     }
   };
 
-  // Initial + continuous refreshing
+  // Live updates: the server pushes a snapshot, then an update whenever jobs
+  // change state, so an idle dashboard costs the backend nothing
   useEffect(() => {
-    fetchStatus(); // data immediately
+    const source = new EventSource("http://localhost:5000/api/events");
 
-    const interval = setInterval(() => {
-      fetchStatus(); // Refresh every 2 seconds
-    }, 2000);
+    const apply = (event) => {
+      const data = JSON.parse(event.data);
+      setStatus((prev) => ({
+        ...prev,
+        ...data,
+        success: true,
+      }));
+      if (data.jobs) {
+        setChanges({ jobs: data.jobs, at: Date.now() });
+      }
+      setError(null);
+    };
+
+    source.addEventListener("snapshot", apply);
+    source.addEventListener("update", apply);
+    // EventSource reconnects by itself; just tell the user meanwhile
+    source.onerror = () => setError("Cannot reach backend at http://localhost:5000");
 
-    return () => clearInterval(interval);
+    return () => source.close();
   }, []);
 
   return (
     <div className="App">
       <Header />
-      <Dashboard status={status} onRefresh={fetchStatus} />
+      <Dashboard status={status} changes={changes} onRefresh={fetchStatus} />
 
       {/* Non-blocking error message */}
       {error && <div className="error">{error}</div>}
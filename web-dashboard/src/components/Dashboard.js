@@ -1,35 +1,55 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './Dashboard.css';
 import StatsCards from './StatsCards';
 import WorkersList from './WorkersList';
 import JobsList from './JobsList';
+import QueuesList from './QueuesList';
 
-function Dashboard({ status, onRefresh }) {
+// Jobs are fetched page by page instead of the whole keyspace
+const PAGE_SIZE = 50;
+// While jobs keep changing, re-fetch the visible page at most this often (ms)
+const REFETCH_INTERVAL = 5000;
+
+function Dashboard({ status, changes, onRefresh }) {
   const [jobs, setJobs] = useState([]);              // Always an array
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalJobs, setTotalJobs] = useState(0);
   const [selectedState, setSelectedState] = useState('all');
+  const [selectedQueue, setSelectedQueue] = useState('all');
   const [isRefreshing, setIsRefreshing] = useState(false);
+  const loadedCount = useRef(0);
+  const lastFetch = useRef(0);
+  const refetchTimer = useRef(null);
 
   const summary = status?.summary || {};
   const workers = status?.workers || [];
+  const queues = status?.queues || {};
 
-  // Fetch all jobs or jobs by state
-  const fetchJobs = async (state = selectedState) => {
+  // Fetch one page of jobs (all or by state, all queues or one). cursor 0
+  // replaces the list, any other cursor appends the next page.
+  const fetchJobs = async (state = selectedState, cursor = 0, limit = PAGE_SIZE, queue = selectedQueue) => {
     try {
       setIsRefreshing(true);
+      lastFetch.current = Date.now();
 
-      const endpoint =
+      const base =
         state === 'all'
           ? 'http://localhost:5000/api/jobs'
           : `http://localhost:5000/api/jobs/${state}`;
+      const queueParam = queue === 'all' ? '' : `&queue=${encodeURIComponent(queue)}`;
+      const endpoint = `${base}?cursor=${cursor}&limit=${limit}${queueParam}`;
 
       const response = await fetch(endpoint);
       const data = await response.json();
 
-      if (data && data.jobs) {
-        setJobs(data.jobs);
-      } else {
-        setJobs([]);
-      }
+      const page = data && data.jobs ? data.jobs : [];
+      setJobs((prev) => {
+        const loaded = cursor === 0 ? page : [...prev, ...page];
+        loadedCount.current = loaded.length;
+        return loaded;
+      });
+      setNextCursor(data ? data.next_cursor ?? null : null);
+      setTotalJobs(data && data.total ? data.total : 0);
     } catch (err) {
       console.error("Error fetching jobs:", err);
       // Do not block UI or force loading screen
@@ -38,16 +58,49 @@ function Dashboard({ status, onRefresh }) {
     }
   };
 
-  // Initial + repeated fetching
+  // Re-fetch the pages already on screen, in one request
+  const refreshJobs = (state = selectedState) =>
+    fetchJobs(state, 0, Math.max(loadedCount.current, PAGE_SIZE), selectedQueue);
+
+  const loadMore = () => {
+    if (nextCursor !== null) {
+      fetchJobs(selectedState, nextCursor, PAGE_SIZE, selectedQueue);
+    }
+  };
+
+  // Fetch the first page whenever the filters change
   useEffect(() => {
+    loadedCount.current = 0;
+    clearTimeout(refetchTimer.current);
+    refetchTimer.current = null;
     fetchJobs(selectedState);
+  }, [selectedState, selectedQueue]);
 
-    const interval = setInterval(() => {
-      fetchJobs(selectedState);
-    }, 5000);
+  // Pushed state changes: patch the rows on screen right away, and re-fetch
+  // the page (throttled) so jobs entering or leaving the filter show up
+  useEffect(() => {
+    if (!changes || changes.jobs.length === 0) {
+      return;
+    }
+    const states = {};
+    changes.jobs.forEach((change) => {
+      states[change.id] = change.state;
+    });
+    setJobs((prev) =>
+      prev.map((job) => (states[job.id] ? { ...job, state: states[job.id] } : job))
+    );
+
+    if (!refetchTimer.current) {
+      const wait = Math.max(REFETCH_INTERVAL - (Date.now() - lastFetch.current), 0);
+      refetchTimer.current = setTimeout(() => {
+        refetchTimer.current = null;
+        refreshJobs();
+      }, wait);
+    }
+  }, [changes]);
 
-    return () => clearInterval(interval);
-  }, [selectedState]);
+  // Drop a pending re-fetch on unmount
+  useEffect(() => () => clearTimeout(refetchTimer.current), []);
 
   return (
     <div className="dashboard">
@@ -57,7 +110,7 @@ function Dashboard({ status, onRefresh }) {
         <div className="dashboard-header">
           <h2>Queue Overview</h2>
           <button
-            onClick={() => fetchJobs(selectedState)}
+            onClick={() => refreshJobs(selectedState)}
             className={`refresh-btn ${isRefreshing ? "refreshing" : ""}`}
             disabled={isRefreshing}
           >
@@ -70,8 +123,13 @@ function Dashboard({ status, onRefresh }) {
 
         <div className="dashboard-grid">
 
-          {/* Workers */}
-          <WorkersList workers={workers} />
+          <div className="side-column">
+            {/* Workers */}
+            <WorkersList workers={workers} />
+
+            {/* Per-queue breakdown */}
+            <QueuesList queues={queues} />
+          </div>
 
           {/* Jobs Section */}
           <div className="jobs-section">
@@ -85,15 +143,33 @@ function Dashboard({ status, onRefresh }) {
               >
                 <option value="all">All Jobs</option>
                 <option value="pending">Pending</option>
+                <option value="waiting">Waiting</option>
                 <option value="processing">Processing</option>
                 <option value="completed">Completed</option>
                 <option value="dead">Dead</option>
                 <option value="delayed">Delayed</option>
               </select>
+
+              <select
+                value={selectedQueue}
+                onChange={(e) => setSelectedQueue(e.target.value)}
+                className="state-filter"
+              >
+                <option value="all">All Queues</option>
+                {Object.keys(queues).map((queue) => (
+                  <option key={queue} value={queue}>{queue}</option>
+                ))}
+              </select>
             </div>
 
             {/* Jobs Table */}
-            <JobsList jobs={jobs} />
+            <JobsList
+              jobs={jobs}
+              total={totalJobs}
+              hasMore={nextCursor !== null}
+              onLoadMore={loadMore}
+              loadingMore={isRefreshing}
+            />
           </div>
         </div>
       </div>
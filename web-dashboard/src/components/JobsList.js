@@ -1,7 +1,7 @@
 import React from 'react';
 import './JobsList.css';
 
-function JobsList({ jobs, loading }) {
+function JobsList({ jobs, loading, total, hasMore, onLoadMore, loadingMore }) {
   // Only show loading on initial load, not on refreshes
   if (loading && (!jobs || jobs.length === 0)) {
     return <div className="loading-jobs">Loading jobs...</div>;
@@ -22,7 +22,9 @@ function JobsList({ jobs, loading }) {
       'dead': '#f44336',
       'DEAD': '#f44336',
       'delayed': '#9c27b0',
-      'DELAYED': '#9c27b0'
+      'DELAYED': '#9c27b0',
+      'waiting': '#607d8b',
+      'WAITING': '#607d8b'
     };
     return colors[state] || '#666';
   };
@@ -73,6 +75,20 @@ function JobsList({ jobs, loading }) {
           ))}
         </div>
       </div>
+      <div className="jobs-footer">
+        <span className="jobs-count">
+          Showing {jobs.length}{total ? ` of ${total}` : ''} jobs
+        </span>
+        {hasMore && (
+          <button
+            className="load-more-btn"
+            onClick={onLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
+      </div>
     </div>
   );
 }
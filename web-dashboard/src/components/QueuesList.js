@@ -0,0 +1,46 @@
+import React from 'react';
+import './QueuesList.css';
+
+// States shown per queue, in pipeline order
+const STATES = ['WAITING', 'PENDING', 'PROCESSING', 'DELAYED', 'COMPLETED', 'DEAD'];
+
+function QueuesList({ queues }) {
+  const names = Object.keys(queues || {});
+
+  if (names.length === 0) {
+    return (
+      <div className="queues-list">
+        <h3>Queues</h3>
+        <div className="empty-state">No queues yet</div>
+      </div>
+    );
+  }
+
+  return (
+    <div className="queues-list">
+      <h3>Queues ({names.length})</h3>
+      <table className="queues-table">
+        <thead>
+          <tr>
+            <th>Queue</th>
+            {STATES.map((state) => (
+              <th key={state}>{state.toLowerCase()}</th>
+            ))}
+          </tr>
+        </thead>
+        <tbody>
+          {names.map((name) => (
+            <tr key={name}>
+              <td className="queue-name">{name}</td>
+              {STATES.map((state) => (
+                <td key={state}>{queues[name][state] || 0}</td>
+              ))}
+            </tr>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
+export default QueuesList;